@@ -4,20 +4,39 @@ from flask import Flask, jsonify
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
 
-from config import Config, FLASK_ENV
+from config import CONFIG
+from json_provider import HAVE_ORJSON, OrjsonProvider
+
+# Flask-Compress is optional; without it responses are sent uncompressed.
+try:
+    from flask_compress import Compress
+    HAVE_COMPRESS = True
+except ImportError:
+    HAVE_COMPRESS = False
 
 db = SQLAlchemy()
 
-def create_app():
+def create_app(config=None):
     app = Flask(__name__)
-    app.config.from_object(Config)
+    app.config.from_object(config or CONFIG)
+
+    # Row-heavy responses (complete table, result lists) serialize much faster with orjson
+    if HAVE_ORJSON:
+        app.json = OrjsonProvider(app)
+    # Emit keys in insertion order and without indentation, even in debug
+    # (Flask 2.3+ replaced JSON_SORT_KEYS / JSONIFY_PRETTYPRINT_REGULAR with these)
+    app.json.sort_keys = False
+    app.json.compact = True
 
     CORS(app)
+    # The complete table and result lists are repetitive JSON that compresses ~10x
+    if HAVE_COMPRESS:
+        Compress(app)
     db.init_app(app)
 
     # In development, ensure tables exist so the dev server can start without running init_db.py manually
     try:
-        if FLASK_ENV == 'development':
+        if app.config.get('FLASK_ENV') == 'development':
             with app.app_context():
                 db.create_all()
     except Exception:
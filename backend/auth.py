@@ -5,13 +5,16 @@ from functools import wraps
 import jwt
 import datetime
 from werkzeug.security import generate_password_hash, check_password_hash
-from config import Config
+from config import CONFIG
 from app import db
 from models import Teacher, TeacherSubjectAllocation, Subject, Admin
 
 # Utility functions used by tests and other modules
 def hash_password(password: str) -> str:
-    return generate_password_hash(password)
+    # Pin scrypt rather than relying on the Werkzeug default, which was a
+    # 600k-round PBKDF2 before 3.0. Older pbkdf2 hashes still verify because
+    # the method is stored in the hash itself.
+    return generate_password_hash(password, method="scrypt", salt_length=16)
 
 
 def verify_password(password: str, hashed: str) -> bool:
@@ -21,6 +24,20 @@ def verify_password(password: str, hashed: str) -> bool:
         return False
 
 
+def admin_credentials(username: str):
+    """
+    (admin_id, password_hash) of the active admin with this username, or None.
+    Not cached: a password change, deactivation or new admin must apply on the
+    very next login in every worker process.
+    """
+    row = (
+        db.session.query(Admin.admin_id, Admin.password_hash)
+        .filter_by(username=username, active=True)
+        .first()
+    )
+    return tuple(row) if row else None
+
+
 def generate_token(user_id: int, user_type: str, expires_hours: int = 10) -> str:
     payload = {
         "user_id": user_id,
@@ -28,12 +45,12 @@ def generate_token(user_id: int, user_type: str, expires_hours: int = 10) -> str
         "exp": datetime.datetime.utcnow() + datetime.timedelta(hours=expires_hours),
         "iat": datetime.datetime.utcnow(),
     }
-    return jwt.encode(payload, Config.SECRET_KEY, algorithm="HS256")
+    return jwt.encode(payload, CONFIG.SECRET_KEY, algorithm="HS256")
 
 
 def verify_token(token: str):
     try:
-        payload = jwt.decode(token, Config.SECRET_KEY, algorithms=["HS256"])
+        payload = jwt.decode(token, CONFIG.SECRET_KEY, algorithms=["HS256"])
         return payload
     except jwt.ExpiredSignatureError:
         return None
@@ -62,7 +79,7 @@ def token_required(f):
         try:
             data = jwt.decode(
                 token,
-                Config.SECRET_KEY,
+                CONFIG.SECRET_KEY,
                 algorithms=["HS256"]
             )
             # Support tokens issued for both teachers and admins.
@@ -126,10 +143,10 @@ def login():
     role = None
     user_id = None
 
-    admin = Admin.query.filter_by(username=userid, active=True).first()
-    if admin and check_password_hash(admin.password_hash, password):
+    admin = admin_credentials(userid)
+    if admin and check_password_hash(admin[1], password):
         role = "ADMIN"
-        user_id = admin.admin_id
+        user_id = admin[0]
     else:
         # Try teacher login (teachers use `userid`)
         user = Teacher.query.filter_by(userid=userid, active=True).first()
@@ -146,7 +163,7 @@ def login():
             "role": role,
             "exp": datetime.datetime.utcnow() + datetime.timedelta(hours=10),
         },
-        Config.SECRET_KEY,
+        CONFIG.SECRET_KEY,
         algorithm="HS256",
     )
 
@@ -183,9 +200,16 @@ def me(user_id=None, user_type=None):
         teacher_id=teacher.teacher_id
     ).all()
 
+    # One IN query for all allocated subjects instead of a lookup per allocation
+    subject_ids = {alloc.subject_id for alloc in allocations}
+    subjects = {
+        s.subject_id: s
+        for s in Subject.query.filter(Subject.subject_id.in_(subject_ids))
+    } if subject_ids else {}
+
     allocation_data = []
     for alloc in allocations:
-        subject = Subject.query.get(alloc.subject_id)
+        subject = subjects.get(alloc.subject_id)
         if subject:
             allocation_data.append({
                 "subject_id": subject.subject_id,
@@ -1,5 +1,6 @@
 # backend/config.py
 import os
+from dataclasses import dataclass, field
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -23,6 +24,14 @@ SQLALCHEMY_DATABASE_URI = (
 
 SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+# Connection pool sized for concurrent dashboard refreshes; keep
+# DB_POOL_SIZE + DB_MAX_OVERFLOW per worker below MySQL's max_connections.
+# pool_pre_ping replaces connections the server dropped, and pool_recycle
+# retires them before MySQL's wait_timeout does.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 20))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 40))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+
 # CORS Configuration
 CORS_ORIGINS = os.getenv("CORS_ORIGINS", "http://localhost:3000").split(",")
 
@@ -34,8 +43,39 @@ MASTER_EXCEL_PATH = os.getenv("MASTER_EXCEL_PATH", os.path.join(os.path.dirname(
 # Expected master sheet name
 MASTER_EXCEL_SHEET = os.getenv("MASTER_EXCEL_SHEET", "Marks")
 
-# Optional Config class (USES SAME URI)
+# Response compression (used when Flask-Compress is installed): brotli
+# preferred, gzip otherwise; small bodies aren't worth compressing
+COMPRESS_ALGORITHM = os.getenv("COMPRESS_ALGORITHM", "br,gzip")
+COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", 1024))
+
+# Frozen config (USES SAME URI). Values above are read from the environment
+# once at import; use CONFIG.<NAME> at call sites instead of re-reading os.environ.
+@dataclass(frozen=True, slots=True)
 class Config:
-    SECRET_KEY = SECRET_KEY
-    SQLALCHEMY_DATABASE_URI = SQLALCHEMY_DATABASE_URI
-    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    FLASK_ENV: str = FLASK_ENV
+    SECRET_KEY: str = SECRET_KEY
+
+    MYSQL_HOST: str = MYSQL_HOST
+    MYSQL_PORT: int = MYSQL_PORT
+    MYSQL_USER: str = MYSQL_USER
+    MYSQL_PASSWORD: str = MYSQL_PASSWORD
+    MYSQL_DB: str = MYSQL_DB
+
+    SQLALCHEMY_DATABASE_URI: str = SQLALCHEMY_DATABASE_URI
+    SQLALCHEMY_TRACK_MODIFICATIONS: bool = SQLALCHEMY_TRACK_MODIFICATIONS
+    SQLALCHEMY_ENGINE_OPTIONS: dict = field(default_factory=lambda: {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_pre_ping": True,
+        "pool_recycle": DB_POOL_RECYCLE,
+    })
+
+    GRACE_MAX: int = GRACE_MAX
+    MASTER_EXCEL_PATH: str = MASTER_EXCEL_PATH
+    MASTER_EXCEL_SHEET: str = MASTER_EXCEL_SHEET
+
+    COMPRESS_ALGORITHM: str = COMPRESS_ALGORITHM
+    COMPRESS_MIN_SIZE: int = COMPRESS_MIN_SIZE
+
+
+CONFIG = Config()
@@ -6,11 +6,12 @@ Utility decorators for Flask routes.
 from functools import wraps
 from typing import Any, Dict, cast
 from flask import request, current_app
-from schemas import PaginationSchema
+from schemas import PaginationSchema, CursorPaginationSchema
 from marshmallow import ValidationError
 from errors import ValidationError as AppValidationError
 
 pagination_schema = PaginationSchema()
+cursor_pagination_schema = CursorPaginationSchema()
 
 # ======================================================
 # PAGINATION DECORATOR (UNCHANGED)
@@ -35,6 +36,27 @@ def paginated(f):
     return decorated_function
 
 
+# ======================================================
+# CURSOR PAGINATION DECORATOR
+# ======================================================
+def cursor_paginated(f):
+    """
+    Decorator to add keyset pagination (?limit=&after=) to list endpoints.
+    Both values are None when the client does not ask for a page.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        try:
+            args_map = {k: request.args[k] for k in ("limit", "after") if k in request.args}
+            cursor_data = cast(Dict[str, Any], cursor_pagination_schema.load(args_map))
+            kwargs["limit"] = cursor_data.get("limit")
+            kwargs["after"] = cursor_data.get("after")
+        except ValidationError as err:
+            return {"error": f"Invalid pagination parameters: {err.messages}"}, 400
+        return f(*args, **kwargs)
+    return decorated_function
+
+
 # ======================================================
 # LOGGING DECORATOR (UNCHANGED)
 # ======================================================
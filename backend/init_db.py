@@ -3,7 +3,7 @@
 
 import pymysql
 import sys
-from config import MYSQL_HOST, MYSQL_PORT, MYSQL_USER, MYSQL_PASSWORD, MYSQL_DB
+from config import CONFIG
 from app import create_app, db
 from models import Subject, Admin, Teacher, Student
 from sqlalchemy import func
@@ -18,17 +18,17 @@ def create_database_if_not_exists():
     """Create the main database if it doesn't exist."""
     try:
         connection = pymysql.connect(
-            host=MYSQL_HOST,
-            port=MYSQL_PORT,
-            user=MYSQL_USER,
-            password=MYSQL_PASSWORD,
+            host=CONFIG.MYSQL_HOST,
+            port=CONFIG.MYSQL_PORT,
+            user=CONFIG.MYSQL_USER,
+            password=CONFIG.MYSQL_PASSWORD,
             charset='utf8mb4'
         )
         with connection.cursor() as cursor:
-            cursor.execute(f"CREATE DATABASE IF NOT EXISTS {MYSQL_DB}")
+            cursor.execute(f"CREATE DATABASE IF NOT EXISTS {CONFIG.MYSQL_DB}")
             connection.commit()
         connection.close()
-        print(f"✓ Database '{MYSQL_DB}' ready")
+        print(f"✓ Database '{CONFIG.MYSQL_DB}' ready")
     except Exception as e:
         print(f"✗ Error creating database: {e}")
         sys.exit(1)
@@ -0,0 +1,60 @@
+# backend/json_provider.py
+"""
+orjson-backed JSON provider for Flask.
+"""
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+    HAVE_ORJSON = True
+except ImportError:
+    HAVE_ORJSON = False
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    DefaultJSONProvider with encoding/decoding done by orjson.
+
+    Dates, dataclasses and other non-native values are passed through to
+    Flask's default handler so the output matches the stdlib provider
+    (e.g. dates stay HTTP-date strings, not ISO 8601, and Decimals strings).
+    One deliberate difference: NaN and infinities become null rather than
+    the stdlib's non-standard NaN/Infinity tokens.
+    """
+
+    def _options(self, sort_keys, indent):
+        option = (
+            orjson.OPT_NON_STR_KEYS
+            | orjson.OPT_PASSTHROUGH_DATETIME
+            | orjson.OPT_PASSTHROUGH_DATACLASS
+        )
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def _dumpb(self, obj, sort_keys, indent=None):
+        try:
+            return orjson.dumps(obj, default=self.default, option=self._options(sort_keys, indent))
+        except orjson.JSONEncodeError:
+            # orjson rejects what the stdlib accepts in a few cases (integers
+            # beyond 64 bits); let the stdlib serialize or raise as before
+            return super().dumps(
+                obj, sort_keys=sort_keys, indent=2 if indent else None,
+                separators=None if indent else (",", ":"),
+            ).encode()
+
+    def dumps(self, obj, **kwargs):
+        return self._dumpb(obj, kwargs.get("sort_keys", self.sort_keys), kwargs.get("indent")).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(
+            self._dumpb(obj, self.sort_keys, indent) + b"\n", mimetype=self.mimetype
+        )
@@ -150,8 +150,26 @@ class Student(db.Model):
     created_at = db.Column(db.DateTime, default=now, nullable=False)
     updated_at = db.Column(db.DateTime, default=now, onupdate=now, nullable=False)
 
+    # Read-only links on (roll_no, division); marks/results carry no FK to students.
+    # Meant for eager loading (selectinload) in result/export queries.
+    marks = db.relationship(
+        "Mark",
+        primaryjoin="and_(Student.roll_no == foreign(Mark.roll_no), "
+                    "Student.division == foreign(Mark.division))",
+        viewonly=True,
+    )
+    result = db.relationship(
+        "Result",
+        primaryjoin="and_(Student.roll_no == foreign(Result.roll_no), "
+                    "Student.division == foreign(Result.division))",
+        viewonly=True,
+        uselist=False,
+    )
+
     __table_args__ = (
         db.UniqueConstraint("roll_no", "division", name="uq_roll_division"),
+        # division filter + roll_no ordering (list_students) as one range scan
+        db.Index("ix_students_division_roll_no", "division", "roll_no"),
     )
 
 # =====================================================
@@ -185,6 +203,8 @@ class Mark(db.Model):
 
     __table_args__ = (
         db.UniqueConstraint("roll_no", "division", "subject_id", name="uq_roll_div_subject"),
+        # division-wide loads (exports, marksheet) and per-subject lists of a division
+        db.Index("ix_marks_division_subject_roll_no", "division", "subject_id", "roll_no"),
     )
 
 # =====================================================
@@ -231,11 +251,28 @@ class Result(db.Model):
 
     __table_args__ = (
         db.UniqueConstraint("roll_no", "division", name="uq_result_roll_division"),
+        # division-wide result reads ordered by roll_no (complete table, exports)
+        db.Index("ix_results_division_roll_no", "division", "roll_no"),
     )
 
     def __repr__(self):
         return f"<Result roll={self.roll_no} div={self.division}>"
 
+# =====================================================
+# BACKGROUND JOBS (services/background_jobs.py)
+# =====================================================
+class BackgroundJob(db.Model):
+    __tablename__ = "background_jobs"
+    job_id = db.Column(db.String(32), primary_key=True)
+    job_key = db.Column(db.String(100), nullable=False)
+    # Holds job_key while the job is queued or running and NULL afterwards:
+    # the unique index allows one active job per key across worker processes.
+    active_key = db.Column(db.String(100), unique=True)
+    status = db.Column(db.String(10), nullable=False)  # queued / running / finished / failed
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=now, nullable=False)
+    finished_at = db.Column(db.DateTime, index=True)
+
 
 # # =====================================================
 # # PERMISSIONS
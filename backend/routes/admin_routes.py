@@ -1,11 +1,15 @@
 # backend/routes/admin_routes.py
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, current_app, g, request, jsonify, stream_with_context
+from sqlalchemy import and_, insert, select
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import load_only, selectinload
+from cachetools import TTLCache
+from marshmallow import ValidationError
 
 from app import db
-from typing import Any, Dict, Optional, cast
-from auth import generate_token
+from typing import TYPE_CHECKING, Any, Dict, cast
+from auth import admin_credentials, generate_token, hash_password, verify_password
 from models import (
     Teacher,
     Subject,
@@ -14,30 +18,205 @@ from models import (
 )
 from schemas import StudentSchema
 from auth import token_required
-from decorators import admin_required
-from services.result_service import generate_results_for_division
+from config import CONFIG
+from decorators import admin_required, cursor_paginated
+from services.result_service import generate_results_for_division, try_ensure_results_for_division, grade_for
+from services.background_jobs import enqueue, job_status
+from services.subject_service import active_subjects
+from services.pdf_service import HAVE_REPORTLAB, render_marksheet
 from models import Result, Subject, Mark
 from flask import send_file
 from io import BytesIO
+from itertools import chain, groupby
+from functools import lru_cache
+from operator import attrgetter
+import os
+import tempfile
+
+# Import openpyxl at runtime if available; expose name for runtime checks.
+if TYPE_CHECKING:
+    import openpyxl  # type: ignore
+    from openpyxl.cell import WriteOnlyCell  # type: ignore
+    from openpyxl.styles import Alignment, Font  # type: ignore
+    from openpyxl.utils import get_column_letter  # type: ignore
+else:
+    try:
+        import openpyxl
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Alignment, Font
+        from openpyxl.utils import get_column_letter
+    except Exception:
+        openpyxl = None  # type: ignore
 
-letter: Optional[Any] = None
-canvas_module: Optional[Any] = None
-try:
-    import importlib
-    _rl_pages = importlib.import_module('reportlab.lib.pagesizes')
-    _rl_canvas = importlib.import_module('reportlab.pdfgen.canvas')
-    letter = getattr(_rl_pages, 'letter', None)
-    canvas_module = _rl_canvas
-except Exception:
-    letter = None
-    canvas_module = None
-
-from werkzeug.security import generate_password_hash
+# Shared marksheet styles; openpyxl styles are immutable, so one instance serves every cell
+if openpyxl is not None:
+    BOLD = Font(bold=True)
+    CENTER = Alignment(horizontal='center')
+    CENTER_V = Alignment(horizontal='center', vertical='center')
+    RIGHT = Alignment(horizontal='right')
 
 
 admin_bp = Blueprint("admin", __name__, url_prefix="/admin")
 
 student_schema = StudentSchema()
+student_schema_many = StudentSchema(many=True)
+
+# Divisions only change when students are added; keep the list for 5 minutes
+_div_cache = TTLCache(maxsize=1, ttl=300)
+
+# (subject code, Result avg attribute, Result grace attribute).
+# Result has no ECO columns, so lookups keep their getattr defaults.
+CORE_RESULT_FIELDS = (
+    ("ENG", "eng_avg", "eng_grace"),
+    ("ECO", "eco_avg", "eco_grace"),
+    ("BK", "bk_avg", "bk_grace"),
+    ("OC", "oc_avg", "oc_grace"),
+)
+OPTIONAL_RESULT_FIELDS = (
+    ("HINDI", "hindi_avg", "hindi_grace"),
+    ("IT", "it_avg", "it_grace"),
+    ("MATHS", "maths_avg", "maths_grace"),
+    ("SP", "sp_avg", "sp_grace"),
+)
+
+
+def _result_getter(attr, default):
+    """attrgetter for a Result column; columns Result lacks (ECO) read as default."""
+    if hasattr(Result, attr):
+        return attrgetter(attr)
+    return lambda _res: default
+
+
+# (subject code, avg getter, grace getter) for every subject on the PDF marksheet
+PDF_RESULT_GETTERS = tuple(
+    (code, _result_getter(avg_attr, None), _result_getter(grace_attr, 0))
+    for code, avg_attr, grace_attr in CORE_RESULT_FIELDS + OPTIONAL_RESULT_FIELDS
+)
+
+# Excel marksheet layout: (block label, candidate subject codes) in print order,
+# the columns inside each block and the maximum-marks row under them.
+MARKSHEET_SUBJECT_ORDER = (
+    ('ENGLISH', ('ENG',)),
+    ('OC', ('OC',)),
+    ('SP / MATHS', ('SP', 'MATHS')),
+    ('ECONOMICS', ('ECO',)),
+    ('B.K. & A/C', ('BK',)),
+)
+MARKSHEET_COLUMNS = ('UNIT I', 'TERM I', 'UNIT II', 'INT', 'ANNUAL', 'TOT', 'AVG', 'GRACE')
+MARKSHEET_MAX_ROW = tuple(
+    chain.from_iterable((25, 50, 25, 20, 80, 200, 100, '') for _ in MARKSHEET_SUBJECT_ORDER)
+)
+
+XLSX_MIMETYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# The only Student columns the result/export endpoints read
+_student_cols = load_only(
+    Student.roll_no, Student.name, Student.division, Student.optional_subject, Student.optional_subject_2
+)
+
+# The only Result columns _build_row and the PDF marksheet read
+_result_cols = load_only(
+    Result.roll_no, Result.name, Result.division, Result.percentage, Result.evs_grade, Result.pe_grade,
+    *(
+        getattr(Result, name)
+        for _, avg_attr, grace_attr in CORE_RESULT_FIELDS + OPTIONAL_RESULT_FIELDS
+        for name in (avg_attr, grace_attr)
+        if hasattr(Result, name)
+    ),
+)
+
+
+def get_subjects_map():
+    """subject_id -> subject_code, loaded once per request."""
+    if not hasattr(g, "subjects_map"):
+        g.subjects_map = dict(db.session.query(Subject.subject_id, Subject.subject_code).all())
+    return g.subjects_map
+
+
+@lru_cache(maxsize=4)
+def _load_master(path, mtime, sheet):
+    """
+    Parse the master Excel sheet in one read_only pass into an index of the
+    first row per (roll_no, division), plus (roll_no, None) for the first
+    row of a roll in any division.
+    mtime is only part of the cache key, so saving the file invalidates it.
+    Treat the returned dict as read-only; it is shared between requests.
+    """
+    wb = openpyxl.load_workbook(path, data_only=True, read_only=True)
+    try:
+        if sheet not in wb.sheetnames:
+            return {}
+        it = wb[sheet].iter_rows(values_only=True)
+        # build header map
+        headers = [str(x).strip().lower() if x is not None else '' for x in next(it)]
+
+        def idx_of(names):
+            for n in names:
+                if n in headers:
+                    return headers.index(n)
+            return None
+
+        r_idx = idx_of(['roll_no', 'roll', 'rollno'])
+        d_idx = idx_of(['division', 'div'])
+        u1_idx = idx_of(['unit1'])
+        u2_idx = idx_of(['unit2'])
+        term_idx = idx_of(['term'])
+        annual_idx = idx_of(['annual'])
+        grace_idx = idx_of(['grace'])
+
+        index = {}
+        for row in it:
+            if not row or all(c is None for c in row):
+                continue
+            rv = row[r_idx] if r_idx is not None and r_idx < len(row) else None
+            dv = row[d_idx] if d_idx is not None and d_idx < len(row) else None
+            if rv is None:
+                continue
+            marks = {
+                'unit1': row[u1_idx] if u1_idx is not None and u1_idx < len(row) else None,
+                'unit2': row[u2_idx] if u2_idx is not None and u2_idx < len(row) else None,
+                'term': row[term_idx] if term_idx is not None and term_idx < len(row) else None,
+                'annual': row[annual_idx] if annual_idx is not None and annual_idx < len(row) else None,
+                'grace': row[grace_idx] if grace_idx is not None and grace_idx < len(row) else None,
+            }
+            roll = str(rv).strip()
+            index.setdefault((roll, None), marks)
+            if dv:
+                index.setdefault((roll, str(dv).strip()), marks)
+        return index
+    finally:
+        wb.close()
+
+
+def _send_workbook(wb, filename):
+    """
+    Save wb to a spooled temp file and send it as an attachment.
+    Small exports stay in memory; past 8 MB they spill to disk instead of
+    holding the whole xlsx in RAM while it is sent.
+    """
+    tmp = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+    wb.save(tmp)
+    tmp.seek(0)
+    return send_file(tmp, download_name=filename, as_attachment=True, conditional=True)
+
+
+def _send_bytes(data, filename, mimetype):
+    """Return an in-memory file as an attachment without a send_file round-trip."""
+    resp = Response(data, mimetype=mimetype)
+    resp.headers.set('Content-Disposition', 'attachment', filename=filename)
+    return resp
+
+
+def _teacher_names(marks):
+    """teacher_id -> name for every teacher who entered one of the given marks."""
+    teacher_ids = {m.entered_by for m in marks if m.entered_by}
+    if not teacher_ids:
+        return {}
+    return dict(
+        db.session.query(Teacher.teacher_id, Teacher.name)
+        .filter(Teacher.teacher_id.in_(teacher_ids))
+        .all()
+    )
 
 
 # ======================================================
@@ -50,18 +229,108 @@ def add_student(user_id=None, user_type=None):
     """
     Add a new student (admin only)
     """
-    data = cast(Dict[str, Any], student_schema.load(request.json or {}))
-
-    student = Student(**data)
+    data = cast(Dict[str, Any], student_schema.load(request.get_json(silent=True) or {}))
 
     try:
-        db.session.add(student)
+        db.session.execute(insert(Student).values(**data))
         db.session.commit()
     except IntegrityError:
         db.session.rollback()
         return {"error": "Student already exists"}, 409
 
-    return {"message": "Student added successfully"}, 201
+    if data["division"] not in _div_cache.get("divs", ()):
+        _div_cache.clear()
+
+    return "", 204
+
+
+# ======================================================
+# 1️⃣b Bulk Add Students
+# ======================================================
+@admin_bp.route("/students/bulk", methods=["POST"])
+@token_required
+@admin_required
+def add_students_bulk(user_id=None, user_type=None):
+    """
+    Add many students in one batched INSERT (admin only).
+    Body: JSON array of students. Rows whose roll_no + division already
+    exist are skipped and reported with status "exists"; rows another
+    request added while this one ran are reported as "skipped".
+    Returns 201 when at least one student was created, 200 when none was,
+    and 400 without inserting anything if any row is invalid.
+    """
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, list) or not payload:
+        return {"error": "JSON array of students is required"}, 400
+
+    try:
+        rows = cast(list, student_schema_many.load(payload))
+    except ValidationError as err:
+        return {"error": "Invalid student rows", "details": err.messages}, 400
+
+    # One lookup for every pair already present instead of a check per row
+    roll_nos = {r["roll_no"] for r in rows}
+    existing = set(
+        db.session.query(Student.roll_no, Student.division)
+        .filter(Student.roll_no.in_(roll_nos))
+        .all()
+    )
+
+    results = []
+    to_insert = []
+    for r in rows:
+        key = (r["roll_no"], r["division"])
+        if key in existing:
+            status = "exists"
+        else:
+            status = "created"
+            existing.add(key)
+            to_insert.append(r)
+        results.append({"roll_no": r["roll_no"], "division": r["division"], "status": status})
+
+    created = 0
+    if to_insert:
+        # executemany of one INSERT; IGNORE covers rows added concurrently on MySQL
+        stmt = insert(Student).prefix_with("IGNORE", dialect="mysql")
+        try:
+            db.session.execute(stmt, to_insert)
+            # IGNORE drops a row silently when another request inserted the
+            # same roll_no + division after the lookup above. Read the keys
+            # back in this transaction: a key that is missing, or holds other
+            # values, was not inserted by this request.
+            stored = {
+                (row.roll_no, row.division): row
+                for row in db.session.query(
+                    Student.roll_no, Student.division, Student.name,
+                    Student.optional_subject, Student.optional_subject_2,
+                ).filter(
+                    Student.roll_no.in_({r["roll_no"] for r in to_insert}),
+                    Student.division.in_({r["division"] for r in to_insert}),
+                )
+            }
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            return {"error": "Some students already exist"}, 409
+
+        skipped = set()
+        for r in to_insert:
+            row = stored.get((r["roll_no"], r["division"]))
+            if row is None or any(
+                getattr(row, f) != r.get(f) for f in ("name", "optional_subject", "optional_subject_2")
+            ):
+                skipped.add((r["roll_no"], r["division"]))
+        for entry in results:
+            if entry["status"] == "created" and (entry["roll_no"], entry["division"]) in skipped:
+                entry["status"] = "skipped"
+        created = len(to_insert) - len(skipped)
+
+        cached = _div_cache.get("divs", ())
+        if any(r["division"] not in cached for r in to_insert):
+            _div_cache.clear()
+
+    # 201 only when the request actually added a student
+    return {"created": created, "results": results}, 201 if created else 200
 
 
 # ======================================================
@@ -70,31 +339,65 @@ def add_student(user_id=None, user_type=None):
 @admin_bp.route("/students", methods=["GET"])
 @token_required
 @admin_required
-def list_students(user_id=None, user_type=None):
+@cursor_paginated
+def list_students(user_id=None, user_type=None, limit=None, after=None):
     """
-    List students by division (admin only)
+    List students by division (admin only), ordered by roll_no.
+
+    The response shape depends on whether a page is asked for:
+    - without limit/after: a bare JSON array of every student (the shape
+      the admin UI has always read);
+    - with ?limit= and/or ?after=<roll_no>: {"items": [...], "next_cursor"},
+      next_cursor being the roll_no to pass as after, or null on the last page.
     """
     division = request.args.get("division")
     if not division:
         return {"error": "division is required"}, 400
 
-    students = (
-        Student.query
+    # Select only the serialized columns; no Student instances are built
+    keys = ("roll_no", "name", "division", "optional_subject", "optional_subject_2")
+    query = (
+        db.session.query(
+            Student.roll_no,
+            Student.name,
+            Student.division,
+            Student.optional_subject,
+            Student.optional_subject_2,
+        )
         .filter_by(division=division)
         .order_by(Student.roll_no)
-        .all()
     )
 
-    return jsonify([
-        {
-            "roll_no": s.roll_no,
-            "name": s.name,
-            "division": s.division,
-            "optional_subject": s.optional_subject,
-            "optional_subject_2": s.optional_subject_2
-        }
-        for s in students
-    ]), 200
+    if limit is None and after is None:
+        # Unpaged: stream the array row by row, fetching from the DB in chunks.
+        # The query runs and its first chunk is fetched before the response
+        # starts, so a failing query still gets an error status. A failure
+        # after that can only abort the transfer: the body then lacks its
+        # closing "]" and never parses as a shorter, valid list.
+        rows = iter(query.yield_per(500))
+        first = next(rows, None)
+
+        def generate():
+            yield "["
+            if first is not None:
+                yield current_app.json.dumps(dict(zip(keys, first)))
+                for row in rows:
+                    yield "," + current_app.json.dumps(dict(zip(keys, row)))
+            yield "]"
+
+        return Response(stream_with_context(generate()), mimetype="application/json"), 200
+
+    if after is not None:
+        query = query.filter(Student.roll_no > after)
+    if limit is not None:
+        query = query.limit(limit)
+    rows = query.all()
+
+    next_cursor = rows[-1].roll_no if limit is not None and len(rows) == limit else None
+    return jsonify({
+        "items": [dict(zip(keys, row)) for row in rows],
+        "next_cursor": next_cursor
+    }), 200
 
 
 # ======================================================
@@ -107,7 +410,7 @@ def allocate_teacher(user_id=None, user_type=None):
     """
     Assign teacher to subject & division (admin only)
     """
-    data: Dict[str, Any] = (request.json or {})
+    data: Dict[str, Any] = request.get_json(silent=True) or {}
     teacher_id = data.get("teacher_id")
     subject_id = data.get("subject_id")
     division = data.get("division")
@@ -115,19 +418,18 @@ def allocate_teacher(user_id=None, user_type=None):
     if not teacher_id or not subject_id or not division:
         return {"error": "teacher_id, subject_id, division required"}, 400
 
-    allocation = TeacherSubjectAllocation()
-    allocation.teacher_id = teacher_id
-    allocation.subject_id = subject_id
-    allocation.division = division
-
     try:
-        db.session.add(allocation)
+        db.session.execute(
+            insert(TeacherSubjectAllocation).values(
+                teacher_id=teacher_id, subject_id=subject_id, division=division
+            )
+        )
         db.session.commit()
     except IntegrityError:
         db.session.rollback()
         return {"error": "Allocation already exists"}, 409
 
-    return {"message": "Teacher allocated successfully"}, 201
+    return "", 204
 
 
 @admin_bp.route('/allocations/<int:allocation_id>', methods=['DELETE'])
@@ -142,7 +444,7 @@ def delete_allocation(allocation_id, user_id=None, user_type=None):
     try:
         db.session.delete(alloc)
         db.session.commit()
-        return {"message": "Allocation deleted"}, 200
+        return "", 204
     except Exception as ex:
         db.session.rollback()
         return {"error": "Failed to delete allocation", "details": str(ex)}, 500
@@ -154,27 +456,63 @@ def delete_allocation(allocation_id, user_id=None, user_type=None):
 @admin_bp.route("/allocations", methods=["GET"])
 @token_required
 @admin_required
-def list_allocations(user_id=None, user_type=None):
+@cursor_paginated
+def list_allocations(user_id=None, user_type=None, limit=None, after=None):
     """
-    List all teacher-subject allocations (admin only)
+    List all teacher-subject allocations (admin only), ordered by allocation_id.
+
+    The response shape depends on whether a page is asked for:
+    - without limit/after: a bare JSON array of every allocation (the shape
+      the admin UI has always read);
+    - with ?limit= and/or ?after=<allocation_id>: {"items": [...], "next_cursor"},
+      next_cursor being the allocation_id to pass as after, or null on the last page.
     """
-    allocations = TeacherSubjectAllocation.query.all()
-
-    result = []
-    for a in allocations:
-        teacher = Teacher.query.get(a.teacher_id)
-        subj = Subject.query.get(a.subject_id)
-        result.append({
-            "allocation_id": a.allocation_id,
-            "teacher_id": a.teacher_id,
-            "teacher_name": teacher.name if teacher else None,
-            "subject_id": a.subject_id,
-            "subject_code": subj.subject_code if subj else None,
-            "subject_name": subj.subject_name if subj else None,
-            "division": a.division
-        })
+    paginate = limit is not None or after is not None
+    if after is not None:
+        try:
+            after = int(after)
+        except ValueError:
+            return {"error": "after must be an allocation_id"}, 400
+
+    # One flat JOIN over allocations -> teachers -> subjects; rows are plain tuples
+    stmt = (
+        select(
+            TeacherSubjectAllocation.allocation_id,
+            TeacherSubjectAllocation.teacher_id,
+            Teacher.name,
+            TeacherSubjectAllocation.subject_id,
+            Subject.subject_code,
+            Subject.subject_name,
+            TeacherSubjectAllocation.division,
+        )
+        .outerjoin(Teacher, Teacher.teacher_id == TeacherSubjectAllocation.teacher_id)
+        .outerjoin(Subject, Subject.subject_id == TeacherSubjectAllocation.subject_id)
+        .order_by(TeacherSubjectAllocation.allocation_id)
+    )
+    if after is not None:
+        stmt = stmt.where(TeacherSubjectAllocation.allocation_id > after)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    rows = db.session.execute(stmt).all()
+
+    result = [
+        {
+            "allocation_id": allocation_id,
+            "teacher_id": teacher_id,
+            "teacher_name": teacher_name,
+            "subject_id": subject_id,
+            "subject_code": subject_code,
+            "subject_name": subject_name,
+            "division": division
+        }
+        for allocation_id, teacher_id, teacher_name, subject_id, subject_code, subject_name, division in rows
+    ]
+
+    if not paginate:
+        return jsonify(result), 200
 
-    return jsonify(result), 200
+    next_cursor = result[-1]["allocation_id"] if limit is not None and len(result) == limit else None
+    return jsonify({"items": result, "next_cursor": next_cursor}), 200
 
 
 # ======================================================
@@ -185,15 +523,29 @@ def list_allocations(user_id=None, user_type=None):
 @admin_required
 def generate_results(user_id=None, user_type=None):
     """
-    Generate / update results for a division (admin only)
+    Queue result generation for a division (admin only).
+    Returns 202 with a job_id; poll GET /admin/results/generate/<job_id>.
     """
-    division = request.json.get("division")
+    data = request.get_json(silent=True) or {}
+    division = data.get("division")
     if not division:
         return {"error": "division is required"}, 400
 
-    generate_results_for_division(division)
+    # one job per division at a time; the returned id is opaque and URL-safe
+    job_id = enqueue(f"gen:{division}", generate_results_for_division, division)
+
+    return {"message": f"Result generation queued for division {division}", "job_id": job_id}, 202
+
 
-    return {"message": f"Results generated for division {division}"}, 200
+@admin_bp.route("/results/generate/<string:job_id>", methods=["GET"])
+@token_required
+@admin_required
+def generate_results_status(job_id, user_id=None, user_type=None):
+    """Status of a queued result generation job (admin only)."""
+    status = job_status(job_id)
+    if status is None:
+        return {"error": "Job not found"}, 404
+    return status, 200
 
 
 # ======================================================
@@ -203,11 +555,138 @@ def generate_results(user_id=None, user_type=None):
 @token_required
 @admin_required
 def list_divisions(user_id=None, user_type=None):
-    divisions = db.session.query(Student.division).distinct().all()
-    divs = [d[0] for d in divisions]
+    divs = _div_cache.get("divs")
+    if divs is None:
+        # Core select over the indexed division column; no ORM entities involved
+        divs = db.session.execute(select(Student.division).distinct()).scalars().all()
+        _div_cache["divs"] = divs
     return jsonify(divs), 200
 
 
+def _mark_detail(m):
+    return {
+        "mark_id": m.mark_id,
+        "unit1": m.unit1,
+        "unit2": m.unit2,
+        "term": m.term,
+        "annual": m.annual,
+        "tot": m.tot,
+        "sub_avg": m.sub_avg,
+        "grace": m.grace,
+    }
+
+
+def _grade_entry(code, stored_grade, m):
+    """EVS/PE entry: stored Result grade, else graded from the Annual mark, else None."""
+    if stored_grade is not None:
+        return {"code": code, "grade": stored_grade}
+    if m and m.annual is not None:
+        return {"code": code, "grade": grade_for(m.annual), "mark": _mark_detail(m)}
+    return None
+
+
+def _build_row(student, result, marks, subjects_map, excel_marks=None, detailed=False):
+    """
+    Result row for one student as served by fetch_results.
+
+    detailed=True is the single-student lookup: mark breakdowns (master Excel
+    row preferred) for every subject and EVS/PE listed before the optional
+    subjects. The division listing keeps the compact shape, where optional
+    subjects fall back to raw marks when no Result row exists yet.
+    """
+    mark_map = {}
+    for m in marks:
+        code = subjects_map.get(m.subject_id)
+        if code:
+            mark_map[code] = m
+
+    subject_entries = []
+    total_avg = 0
+    total_grace = 0
+
+    for code, avg_attr, grace_attr in CORE_RESULT_FIELDS:
+        m = mark_map.get(code)
+        if result:
+            avg = getattr(result, avg_attr, None)
+            grace = getattr(result, grace_attr, 0) or 0
+        else:
+            avg = m.annual if m and m.annual is not None else None
+            grace = m.grace if m and m.grace is not None else 0
+
+        final = None
+        if avg is not None:
+            final = (avg or 0) + (grace or 0)
+            total_avg += avg or 0
+            total_grace += grace or 0
+
+        # include detailed mark breakdown if available; prefer excel row values when present
+        mark_detail = None
+        if excel_marks is not None:
+            mark_detail = {k: excel_marks.get(k) for k in ('unit1', 'unit2', 'term', 'annual', 'grace')}
+        elif m:
+            mark_detail = _mark_detail(m)
+
+        subject_entries.append({"code": code, "avg": avg, "grace": grace, "final": final, "mark": mark_detail})
+
+    # EVS and PE (grade-only) — prefer grades from Result, fall back to marks
+    grade_entries = [
+        e for e in (
+            _grade_entry("EVS", getattr(result, 'evs_grade', None) if result else None, mark_map.get('EVS')),
+            _grade_entry("PE", getattr(result, 'pe_grade', None) if result else None, mark_map.get('PE')),
+        )
+        if e is not None
+    ]
+    if detailed:
+        subject_entries.extend(grade_entries)
+
+    for code, avg_attr, grace_attr in OPTIONAL_RESULT_FIELDS:
+        if code in ("HINDI", "IT"):
+            include = student.optional_subject == code
+        else:
+            include = student.optional_subject_2 == code
+        if not include:
+            continue
+
+        m = mark_map.get(code)
+        if detailed:
+            avg = getattr(result, avg_attr, None) if result else None
+            grace = getattr(result, grace_attr, 0) if result else 0
+        elif result:
+            avg = getattr(result, avg_attr, None)
+            grace = getattr(result, grace_attr, 0) or 0
+        else:
+            avg = m.annual if m and m.annual is not None else None
+            grace = m.grace if m and m.grace is not None else 0
+
+        final = None
+        if avg is not None:
+            final = (avg or 0) + (grace or 0)
+            total_avg += avg or 0
+            total_grace += grace or 0
+
+        entry = {"code": code, "avg": avg, "grace": grace, "final": final}
+        if detailed:
+            entry["mark"] = _mark_detail(m) if m else None
+        subject_entries.append(entry)
+
+    if not detailed:
+        subject_entries.extend(grade_entries)
+
+    # Only show final_total if percentage exists (i.e., result fully computed)
+    percentage = getattr(result, "percentage", None) if result else None
+    final_total = total_avg + total_grace if subject_entries and percentage is not None else None
+
+    return {
+        "roll_no": student.roll_no,
+        "name": student.name,
+        "subjects": subject_entries,
+        "total_avg": round(total_avg, 2),
+        "total_grace": round(total_grace, 2),
+        "final_total": round(final_total, 2) if final_total is not None else None,
+        "percentage": percentage,
+    }
+
+
 # ======================================================
 # 7️⃣ Fetch results by division or roll_no (admin)
 # Query params: division OR roll_no (+ optional division)
@@ -221,231 +700,48 @@ def fetch_results(user_id=None, user_type=None):
 
     # If roll_no provided, optionally restrict by division
     if roll_no:
-        students = Student.query.filter_by(roll_no=roll_no)
+        students_q = Student.query.filter_by(roll_no=roll_no)
         if division:
-            students = students.filter_by(division=division)
-        students = students.all()
-        if not students:
+            students_q = students_q.filter_by(division=division)
+        divisions = {d for (d,) in students_q.with_entities(Student.division)}
+        if not divisions:
             return {"error": "Student not found"}, 404
 
-        # Ensure results are generated for involved divisions
-        for s in students:
-            try:
-                generate_results_for_division(s.division)
-            except Exception:
-                pass
+        # Regenerate results only for involved divisions whose marks changed.
+        # Done before loading rows: a regeneration commit expires loaded objects.
+        for d in divisions:
+            try_ensure_results_for_division(d)
+
+        # Each matching student (usually one) with its Result and Marks
+        students = students_q.options(
+            _student_cols, selectinload(Student.result).options(_result_cols), selectinload(Student.marks)
+        ).all()
 
         # Build rows for each matching student (usually one)
         rows = []
+        subjects_map = get_subjects_map()
+
         # Prefer master Excel file data if available
-        from config import MASTER_EXCEL_PATH, MASTER_EXCEL_SHEET
-        use_excel = False
-        try:
-            import os
-            if os.path.exists(MASTER_EXCEL_PATH):
-                use_excel = True
-        except Exception:
-            use_excel = False
+        use_excel = openpyxl is not None and os.path.exists(CONFIG.MASTER_EXCEL_PATH)
+        # Parse the master sheet once for all matching students
+        excel_index = {}
+        if use_excel:
+            try:
+                excel_index = _load_master(
+                    CONFIG.MASTER_EXCEL_PATH,
+                    os.path.getmtime(CONFIG.MASTER_EXCEL_PATH),
+                    CONFIG.MASTER_EXCEL_SHEET,
+                )
+            except Exception:
+                excel_index = {}
         for s in students:
-            # If a master Excel exists, try to read detailed marks from it for this roll
-            excel_marks = None
-            if use_excel:
-                try:
-                    import openpyxl, io
-                    data = openpyxl.load_workbook(MASTER_EXCEL_PATH, data_only=True)
-                    if MASTER_EXCEL_SHEET in data.sheetnames:
-                        sh = data[MASTER_EXCEL_SHEET]
-                        # build header map
-                        it = sh.iter_rows(values_only=True)
-                        headers = [str(x).strip().lower() if x is not None else '' for x in next(it)]
-                        def idx_of(names):
-                            for n in names:
-                                if n in headers:
-                                    return headers.index(n)
-                            return None
-                        r_idx = idx_of(['roll_no', 'roll', 'rollno'])
-                        d_idx = idx_of(['division', 'div'])
-                        # subject column may be subject code
-                        subj_idx = idx_of(['subject', 'subject_code', 'subject_id'])
-                        u1_idx = idx_of(['unit1'])
-                        u2_idx = idx_of(['unit2'])
-                        term_idx = idx_of(['term'])
-                        annual_idx = idx_of(['annual'])
-                        grace_idx = idx_of(['grace'])
-                        for row in it:
-                            if not row or all(c is None for c in row):
-                                continue
-                            rv = row[r_idx] if r_idx is not None and r_idx < len(row) else None
-                            dv = row[d_idx] if d_idx is not None and d_idx < len(row) else None
-                            if rv is None:
-                                continue
-                            if str(rv).strip() == str(s.roll_no).strip() and (not division or (dv and str(dv).strip() == str(s.division).strip())):
-                                # found matching excel row
-                                excel_marks = {
-                                    'unit1': row[u1_idx] if u1_idx is not None and u1_idx < len(row) else None,
-                                    'unit2': row[u2_idx] if u2_idx is not None and u2_idx < len(row) else None,
-                                    'term': row[term_idx] if term_idx is not None and term_idx < len(row) else None,
-                                    'annual': row[annual_idx] if annual_idx is not None and annual_idx < len(row) else None,
-                                    'grace': row[grace_idx] if grace_idx is not None and grace_idx < len(row) else None,
-                                }
-                                break
-                except Exception:
-                    excel_marks = None
-
-            result = Result.query.filter_by(roll_no=s.roll_no, division=s.division).first()
-            # If result is missing, fall back to available Marks so UI can show partial data
-            marks = Mark.query.filter_by(roll_no=s.roll_no, division=s.division).all()
-            subjects_map = {sub.subject_id: sub.subject_code for sub in Subject.query.all()}
-            mark_map = {}
-            for m in marks:
-                code = subjects_map.get(m.subject_id)
-                if code:
-                    mark_map[code] = m
-
-            subject_entries = []
-            total_avg = 0
-            total_grace = 0
-
-            for code, field in {"ENG": "eng", "ECO": "eco", "BK": "bk", "OC": "oc"}.items():
-                if result:
-                    avg = getattr(result, f"{field}_avg", None)
-                    grace = getattr(result, f"{field}_grace", 0) or 0
-                else:
-                    m = mark_map.get(code)
-                    avg = m.annual if m and m.annual is not None else None
-                    grace = m.grace if m and m.grace is not None else 0
-
-                final = None
-                if avg is not None:
-                    final = (avg or 0) + (grace or 0)
-                    total_avg += avg or 0
-                    total_grace += grace or 0
-
-                # include detailed mark breakdown if available; prefer excel row values when present
-                m = mark_map.get(code)
-                mark_detail = None
-                if excel_marks is not None:
-                    mark_detail = {
-                        "unit1": excel_marks.get('unit1'),
-                        "unit2": excel_marks.get('unit2'),
-                        "term": excel_marks.get('term'),
-                        "annual": excel_marks.get('annual'),
-                        "grace": excel_marks.get('grace'),
-                    }
-                elif m:
-                    mark_detail = {
-                        "mark_id": m.mark_id,
-                        "unit1": m.unit1,
-                        "unit2": m.unit2,
-                        "term": m.term,
-                        "annual": m.annual,
-                        "tot": m.tot,
-                        "sub_avg": m.sub_avg,
-                        "grace": m.grace,
-                    }
-
-                subject_entries.append({
-                    "code": code,
-                    "avg": avg,
-                    "grace": grace,
-                    "final": final,
-                    "mark": mark_detail
-                })
-
-            # EVS and PE (grade-only) — prefer grades from Result, fall back to marks
-            if result and getattr(result, 'evs_grade', None) is not None:
-                subject_entries.append({"code": "EVS", "grade": result.evs_grade})
-            else:
-                m = mark_map.get('EVS')
-                if m and m.annual is not None:
-                    a = m.annual
-                    grade = None
-                    if a >= 75:
-                        grade = 'A+'
-                    elif a >= 60:
-                        grade = 'A'
-                    elif a >= 50:
-                        grade = 'B'
-                    elif a >= 35:
-                        grade = 'C'
-                    else:
-                        grade = 'F'
-                    subject_entries.append({"code": "EVS", "grade": grade, "mark": {"annual": m.annual, "mark_id": m.mark_id, "unit1": m.unit1, "unit2": m.unit2, "term": m.term, "tot": m.tot, "sub_avg": m.sub_avg, "grace": m.grace}})
-
-            if result and getattr(result, 'pe_grade', None) is not None:
-                subject_entries.append({"code": "PE", "grade": result.pe_grade})
-            else:
-                m = mark_map.get('PE')
-                if m and m.annual is not None:
-                    a = m.annual
-                    grade = None
-                    if a >= 75:
-                        grade = 'A+'
-                    elif a >= 60:
-                        grade = 'A'
-                    elif a >= 50:
-                        grade = 'B'
-                    elif a >= 35:
-                        grade = 'C'
-                    else:
-                        grade = 'F'
-                    subject_entries.append({"code": "PE", "grade": grade, "mark": {"annual": m.annual, "mark_id": m.mark_id, "unit1": m.unit1, "unit2": m.unit2, "term": m.term, "tot": m.tot, "sub_avg": m.sub_avg, "grace": m.grace}})
-
-            for code, field in {"HINDI": "hindi", "IT": "it", "MATHS": "maths", "SP": "sp"}.items():
-                include = False
-                if code in ("HINDI", "IT") and s.optional_subject == code:
-                    include = True
-                if code in ("MATHS", "SP") and s.optional_subject_2 == code:
-                    include = True
-                if include:
-                    avg = getattr(result, f"{field}_avg", None) if result else None
-                    grace = getattr(result, f"{field}_grace", 0) if result else 0
-                    final = None
-                    if avg is not None:
-                        final = (avg or 0) + (grace or 0)
-                        total_avg += avg or 0
-                        total_grace += grace or 0
-
-                    # include detailed mark breakdown if available
-                    m = mark_map.get(code)
-                    mark_detail = None
-                    if m:
-                        mark_detail = {
-                            "mark_id": m.mark_id,
-                            "unit1": m.unit1,
-                            "unit2": m.unit2,
-                            "term": m.term,
-                            "annual": m.annual,
-                            "tot": m.tot,
-                            "sub_avg": m.sub_avg,
-                            "grace": m.grace,
-                        }
-
-                    subject_entries.append({
-                        "code": code,
-                        "avg": avg,
-                        "grace": grace,
-                        "final": final,
-                        "mark": mark_detail
-                    })
-
-            final_total = None
-            if subject_entries:
-                # Only show final_total if percentage exists (i.e., result fully computed)
-                perc = getattr(result, "percentage", None) if result else None
-                if perc is not None:
-                    final_total = total_avg + total_grace
+            # If a master Excel exists, use the first row for this roll (and division when filtered)
+            excel_marks = excel_index.get((str(s.roll_no).strip(), str(s.division).strip() if division else None))
 
-            rows.append({
-                "roll_no": s.roll_no,
-                "name": s.name,
-                "division": s.division,
-                "subjects": subject_entries,
-                "total_avg": round(total_avg, 2),
-                "total_grace": round(total_grace, 2),
-                "final_total": round(final_total, 2) if final_total is not None else None,
-                "percentage": getattr(result, "percentage", None) if result else None,
-            })
+            # If result is missing, fall back to available Marks so UI can show partial data
+            row = _build_row(s, s.result, s.marks, subjects_map, excel_marks, detailed=True)
+            row["division"] = s.division
+            rows.append(row)
 
         # If caller requested a single roll_no, return single object
         if len(rows) == 1:
@@ -456,139 +752,35 @@ def fetch_results(user_id=None, user_type=None):
     if not division:
         return {"error": "division or roll_no is required"}, 400
 
-    # regenerate results for the division
-    try:
-        generate_results_for_division(division)
-    except Exception:
-        pass
-
-    # Build rows for entire division
-    students = Student.query.filter_by(division=division).order_by(Student.roll_no).all()
+    # regenerate results for the division if its marks changed
+    try_ensure_results_for_division(division)
+
+    # Build rows for entire division from one round-trip:
+    # every student with its Result and each of its Marks (+ subject code)
+    stmt = (
+        select(Student, Result, Mark, Subject.subject_code)
+        .select_from(Student)
+        .outerjoin(Result, and_(Result.roll_no == Student.roll_no, Result.division == Student.division))
+        .outerjoin(Mark, and_(Mark.roll_no == Student.roll_no, Mark.division == Student.division))
+        .outerjoin(Subject, Subject.subject_id == Mark.subject_id)
+        .where(Student.division == division)
+        .options(_student_cols, _result_cols)
+        .order_by(Student.roll_no, Student.student_id)
+    )
     rows = []
-    for idx, s in enumerate(students, start=1):
-        result = Result.query.filter_by(roll_no=s.roll_no, division=s.division).first()
-        # Prepare mark map to allow partial display when Result row missing
-        marks = Mark.query.filter_by(roll_no=s.roll_no, division=s.division).all()
-        subjects_map = {sub.subject_id: sub.subject_code for sub in Subject.query.all()}
-        mark_map = {}
-        for m in marks:
-            code = subjects_map.get(m.subject_id)
-            if code:
-                mark_map[code] = m
-
-        subject_entries = []
-        total_avg = 0
-        total_grace = 0
-
-        for code, field in {"ENG": "eng", "ECO": "eco", "BK": "bk", "OC": "oc"}.items():
-            if result:
-                avg = getattr(result, f"{field}_avg", None)
-                grace = getattr(result, f"{field}_grace", 0) or 0
-            else:
-                m = mark_map.get(code)
-                avg = m.annual if m and m.annual is not None else None
-                grace = m.grace if m and m.grace is not None else 0
-
-            final = None
-            if avg is not None:
-                final = (avg or 0) + (grace or 0)
-                total_avg += avg or 0
-                total_grace += grace or 0
-
-            # include mark detail when present
-            m = mark_map.get(code)
-            mark_detail = None
-            if m:
-                mark_detail = {
-                    "mark_id": m.mark_id,
-                    "unit1": m.unit1,
-                    "unit2": m.unit2,
-                    "term": m.term,
-                    "annual": m.annual,
-                    "tot": m.tot,
-                    "sub_avg": m.sub_avg,
-                    "grace": m.grace,
-                }
-
-            subject_entries.append({"code": code, "avg": avg, "grace": grace, "final": final, "mark": mark_detail})
-
-        for code, field in {"HINDI": "hindi", "IT": "it", "MATHS": "maths", "SP": "sp"}.items():
-            include = False
-            if code in ("HINDI", "IT") and s.optional_subject == code:
-                include = True
-            if code in ("MATHS", "SP") and s.optional_subject_2 == code:
-                include = True
-
-            if include:
-                if result:
-                    avg = getattr(result, f"{field}_avg", None)
-                    grace = getattr(result, f"{field}_grace", 0) or 0
-                else:
-                    m = mark_map.get(code)
-                    avg = m.annual if m and m.annual is not None else None
-                    grace = m.grace if m and m.grace is not None else 0
-                final = None
-                if avg is not None:
-                    final = (avg or 0) + (grace or 0)
-                    total_avg += avg or 0
-                    total_grace += grace or 0
-
-                subject_entries.append({"code": code, "avg": avg, "grace": grace, "final": final})
-        # EVS and PE (grade-only) — append once after optional subjects
-        if result and getattr(result, 'evs_grade', None) is not None:
-            subject_entries.append({"code": "EVS", "grade": result.evs_grade})
-        else:
-            m = mark_map.get('EVS')
-            if m and m.annual is not None:
-                a = m.annual
-                grade = None
-                if a >= 75:
-                    grade = 'A+'
-                elif a >= 60:
-                    grade = 'A'
-                elif a >= 50:
-                    grade = 'B'
-                elif a >= 35:
-                    grade = 'C'
-                else:
-                    grade = 'F'
-                subject_entries.append({"code": "EVS", "grade": grade, "mark": {"annual": m.annual, "mark_id": m.mark_id, "unit1": m.unit1, "unit2": m.unit2, "term": m.term, "tot": m.tot, "sub_avg": m.sub_avg, "grace": m.grace}})
-
-        if result and getattr(result, 'pe_grade', None) is not None:
-            subject_entries.append({"code": "PE", "grade": result.pe_grade})
-        else:
-            m = mark_map.get('PE')
-            if m and m.annual is not None:
-                a = m.annual
-                grade = None
-                if a >= 75:
-                    grade = 'A+'
-                elif a >= 60:
-                    grade = 'A'
-                elif a >= 50:
-                    grade = 'B'
-                elif a >= 35:
-                    grade = 'C'
-                else:
-                    grade = 'F'
-                subject_entries.append({"code": "PE", "grade": grade, "mark": {"annual": m.annual, "mark_id": m.mark_id, "unit1": m.unit1, "unit2": m.unit2, "term": m.term, "tot": m.tot, "sub_avg": m.sub_avg, "grace": m.grace}})
-
-        final_total = None
-        if subject_entries:
-            perc = getattr(result, "percentage", None) if result else None
-            if perc is not None:
-                final_total = total_avg + total_grace
-
-        rows.append({
-            "seq": idx,
-            "roll_no": s.roll_no,
-            "name": s.name,
-            "subjects": subject_entries,
-            "total_avg": round(total_avg, 2),
-            "total_grace": round(total_grace, 2),
-            "final_total": round(final_total, 2) if final_total is not None else None,
-            "percentage": getattr(result, "percentage", None) if result else None,
-        })
+    subjects_map = {}
+    for idx, (s, group) in enumerate(groupby(db.session.execute(stmt), key=lambda r: r[0]), start=1):
+        result = None
+        marks = []
+        for _, result, m, code in group:
+            if m is not None:
+                marks.append(m)
+                if code:
+                    subjects_map[m.subject_id] = code
+        # Marks allow partial display when Result row missing
+        row = _build_row(s, result, marks, subjects_map)
+        row["seq"] = idx
+        rows.append(row)
 
     return jsonify(rows), 200
 
@@ -598,12 +790,10 @@ def fetch_results(user_id=None, user_type=None):
 @admin_required
 def download_master_excel(user_id=None, user_type=None):
     """Allow admin to download or open the shared master Excel file."""
-    from config import MASTER_EXCEL_PATH
-    import os
-    if not os.path.exists(MASTER_EXCEL_PATH):
+    if not os.path.exists(CONFIG.MASTER_EXCEL_PATH):
         return {"error": "Master Excel file not found on server"}, 404
     try:
-        return send_file(MASTER_EXCEL_PATH, as_attachment=True)
+        return send_file(CONFIG.MASTER_EXCEL_PATH, as_attachment=True)
     except Exception as ex:
         return {"error": "Failed to send master Excel file", "details": str(ex)}, 500
 
@@ -619,12 +809,16 @@ def download_student_excel(user_id=None, user_type=None):
         return {"error": "roll_no and division are required"}, 400
 
     # Fetch student and marks
-    student = Student.query.filter_by(roll_no=roll_no, division=division).first()
+    student = (
+        Student.query.options(_student_cols, selectinload(Student.marks))
+        .filter_by(roll_no=roll_no, division=division)
+        .first()
+    )
     if not student:
         return {"error": "Student not found"}, 404
 
     # Prepare per-subject rows: iterate through all subjects student takes
-    all_subjects = Subject.query.filter_by(active=True).order_by(Subject.subject_code).all()
+    all_subjects = active_subjects()
     include_codes = set()
     for s in all_subjects:
         if s.subject_type == 'CORE':
@@ -636,14 +830,14 @@ def download_student_excel(user_id=None, user_type=None):
 
     subjects = [s for s in all_subjects if s.subject_code in include_codes]
 
+    marks = {m.subject_id: m for m in student.marks}
+    teachers = _teacher_names(student.marks)
+
     # Build rows
     rows = []
     for s in subjects:
-        m = Mark.query.filter_by(roll_no=roll_no, division=division, subject_id=s.subject_id).first()
-        teacher_name = None
-        if m and m.entered_by:
-            t = Teacher.query.get(m.entered_by)
-            teacher_name = t.name if t else None
+        m = marks.get(s.subject_id)
+        teacher_name = teachers.get(m.entered_by) if m and m.entered_by else None
 
         rows.append({
             'roll_no': roll_no,
@@ -662,11 +856,12 @@ def download_student_excel(user_id=None, user_type=None):
         })
 
     # Create Excel
+    if openpyxl is None:
+        return {"error": "Server missing Excel support (openpyxl)"}, 500
     try:
-        from openpyxl import Workbook
-        wb = Workbook()
-        ws = cast(Any, wb.active)
-        ws.title = 'Marks'
+        # write_only streams rows instead of keeping every cell in memory
+        wb = openpyxl.Workbook(write_only=True)
+        ws = wb.create_sheet('Marks')
         headers = ['Roll', 'Student Name', 'Subject', 'Division', 'Unit1', 'Unit2', 'Term', 'Annual', 'Tot', 'Sub_Avg', 'Grace', 'Final', 'Entered By']
         ws.append(headers)
         for r in rows:
@@ -688,9 +883,7 @@ def download_student_excel(user_id=None, user_type=None):
 
         bio = BytesIO()
         wb.save(bio)
-        bio.seek(0)
-        filename = f"student_{roll_no}_{division}.xlsx"
-        return send_file(bio, download_name=filename, as_attachment=True)
+        return _send_bytes(bio.getvalue(), f"student_{roll_no}_{division}.xlsx", XLSX_MIMETYPE)
     except Exception as ex:
         return {"error": "Failed to generate Excel", "details": str(ex)}, 500
 
@@ -713,56 +906,63 @@ def download_complete_excel(user_id=None, user_type=None):
         students_q = Student.query.filter_by(roll_no=roll_no)
         if division:
             students_q = students_q.filter_by(division=division)
-        students = students_q.all()
-        if not students:
-            return {"error": "Student not found"}, 404
+        not_found = {"error": "Student not found"}
     else:
         if not division:
             return {"error": "division or roll_no is required"}, 400
-        students = Student.query.filter_by(division=division).order_by(Student.roll_no).all()
-        if not students:
-            return {"error": "No students found for division"}, 404
+        students_q = Student.query.filter_by(division=division).order_by(Student.roll_no)
+        not_found = {"error": "No students found for division"}
 
-    all_subjects = Subject.query.filter_by(active=True).order_by(Subject.subject_code).all()
+    divisions = {d for (d,) in students_q.with_entities(Student.division).order_by(None)}
+    if not divisions:
+        return not_found, 404
 
-    rows = []
-    # Ensure results are generated for each involved division
-    try:
-        divisions = set(s.division for s in students)
-        for d in divisions:
-            try:
-                generate_results_for_division(d)
-            except Exception:
-                pass
-    except Exception:
-        pass
-    for s in students:
-        include_codes = set()
-        for sub in all_subjects:
-            if sub.subject_type == 'CORE':
-                include_codes.add(sub.subject_code)
-        if s.optional_subject:
-            include_codes.add(s.optional_subject)
-        if s.optional_subject_2:
-            include_codes.add(s.optional_subject_2)
+    # Ensure results are generated for each involved division.
+    # Done before loading rows: a regeneration commit expires loaded objects.
+    for d in divisions:
+        try_ensure_results_for_division(d)
 
-        for code in sorted(include_codes):
-            subj = next((x for x in all_subjects if x.subject_code == code), None)
-            if not subj:
-                continue
-            m = Mark.query.filter_by(roll_no=s.roll_no, division=s.division, subject_id=subj.subject_id).first()
+    students = students_q.options(_student_cols, selectinload(Student.marks)).all()
 
-            rows.append({
-                'Roll': s.roll_no,
-                'Student Name': s.name,
-                'Subject': code,
-                'Division': s.division,
-                'Unit1': m.unit1 if m and m.unit1 is not None else '',
-                'Term': m.term if m and m.term is not None else '',
-                'Unit2': m.unit2 if m and m.unit2 is not None else '',
-                'Annual': m.annual if m and m.annual is not None else '',
-                'Grace': m.grace if m and m.grace is not None else ''
-            })
+    all_subjects = active_subjects()
+    subjects_by_code = {x.subject_code: x for x in all_subjects}
+    core_codes = {sub.subject_code for sub in all_subjects if sub.subject_type == 'CORE'}
+
+    rows = []
+    # Students share a handful of optional-subject combinations; resolve the
+    # ordered (code, subject_id) list once per combination.
+    plans = {}
+    for s in students:
+        key = (s.optional_subject, s.optional_subject_2)
+        plan = plans.get(key)
+        if plan is None:
+            include_codes = set(core_codes)
+            if s.optional_subject:
+                include_codes.add(s.optional_subject)
+            if s.optional_subject_2:
+                include_codes.add(s.optional_subject_2)
+            plan = plans[key] = [
+                (code, subjects_by_code[code].subject_id)
+                for code in sorted(include_codes)
+                if code in subjects_by_code
+            ]
+
+        marks = {m.subject_id: m for m in s.marks}
+        for code, subject_id in plan:
+            m = marks.get(subject_id)
+
+            # Plain list in `headers` order, appended to the sheet as-is
+            rows.append([
+                s.roll_no,
+                s.name,
+                code,
+                s.division,
+                m.unit1 if m and m.unit1 is not None else '',
+                m.term if m and m.term is not None else '',
+                m.unit2 if m and m.unit2 is not None else '',
+                m.annual if m and m.annual is not None else '',
+                m.grace if m and m.grace is not None else '',
+            ])
 
     headers = [
         "Roll",
@@ -776,25 +976,23 @@ def download_complete_excel(user_id=None, user_type=None):
         "Grace",
     ]
 
+    if openpyxl is None:
+        return {"error": "Server missing Excel support (openpyxl)"}, 500
     try:
-        from openpyxl import Workbook
-        wb = Workbook()
-        ws = cast(Any, wb.active)
-        ws.title = 'Complete Results'
+        # write_only streams rows instead of keeping every cell in memory
+        wb = openpyxl.Workbook(write_only=True)
+        ws = wb.create_sheet('Complete Results')
         ws.append(headers)
         for r in rows:
-            ws.append([r.get(h, '') for h in headers])
+            ws.append(r)
 
-        bio = BytesIO()
-        wb.save(bio)
-        bio.seek(0)
         fn = 'complete_results'
         if division:
             fn += f'_{division}'
         if roll_no:
             fn += f'_roll_{roll_no}'
         fn += '.xlsx'
-        return send_file(bio, download_name=fn, as_attachment=True)
+        return _send_workbook(wb, fn)
     except Exception as ex:
         return {"error": "Failed to generate Excel", "details": str(ex)}, 500
 
@@ -808,33 +1006,36 @@ def download_division_excel(user_id=None, user_type=None):
         return {"error": "division is required"}, 400
 
     # Build rows for all students in division
-    students = Student.query.filter_by(division=division).order_by(Student.roll_no).all()
+    students = (
+        Student.query.options(_student_cols, selectinload(Student.marks))
+        .filter_by(division=division)
+        .order_by(Student.roll_no)
+        .all()
+    )
     if not students:
         return {"error": "No students found for division"}, 404
 
     rows = []
-    all_subjects = Subject.query.filter_by(active=True).order_by(Subject.subject_code).all()
+    all_subjects = active_subjects()
     subjects_codes = [s.subject_code for s in all_subjects]
+    subjects_by_code = {x.subject_code: x for x in all_subjects}
+    core_codes = {sub.subject_code for sub in all_subjects if sub.subject_type == 'CORE'}
+    teachers = _teacher_names(m for s in students for m in s.marks)
 
     for s in students:
-        include_codes = set()
-        for sub in all_subjects:
-            if sub.subject_type == 'CORE':
-                include_codes.add(sub.subject_code)
+        marks = {m.subject_id: m for m in s.marks}
+        include_codes = set(core_codes)
         if s.optional_subject:
             include_codes.add(s.optional_subject)
         if s.optional_subject_2:
             include_codes.add(s.optional_subject_2)
 
         for code in sorted(include_codes):
-            subj = next((x for x in all_subjects if x.subject_code == code), None)
+            subj = subjects_by_code.get(code)
             if not subj:
                 continue
-            m = Mark.query.filter_by(roll_no=s.roll_no, division=s.division, subject_id=subj.subject_id).first()
-            teacher_name = None
-            if m and m.entered_by:
-                t = Teacher.query.get(m.entered_by)
-                teacher_name = t.name if t else None
+            m = marks.get(subj.subject_id)
+            teacher_name = teachers.get(m.entered_by) if m and m.entered_by else None
             rows.append({
                 'roll_no': s.roll_no,
                 'student_name': s.name,
@@ -849,11 +1050,12 @@ def download_division_excel(user_id=None, user_type=None):
             })
 
     # Create Excel file
+    if openpyxl is None:
+        return {"error": "Server missing Excel support (openpyxl)"}, 500
     try:
-        from openpyxl import Workbook
-        wb = Workbook()
-        ws = cast(Any, wb.active)
-        ws.title = 'Marks'
+        # write_only streams rows instead of keeping every cell in memory
+        wb = openpyxl.Workbook(write_only=True)
+        ws = wb.create_sheet('Marks')
         headers = ['Roll', 'Student Name', 'Subject', 'Division', 'Unit1', 'Unit2', 'Term', 'Annual', 'Grace', 'Entered By']
         ws.append(headers)
         for r in rows:
@@ -866,15 +1068,24 @@ def download_division_excel(user_id=None, user_type=None):
                 r['grace'] if r['grace'] is not None else '',
                 r['entered_by'] or ''
             ])
-        bio = BytesIO()
-        wb.save(bio)
-        bio.seek(0)
         filename = f"division_{division}_marks.xlsx"
-        return send_file(bio, download_name=filename, as_attachment=True)
+        return _send_workbook(wb, filename)
     except Exception as ex:
         return {"error": "Failed to generate Excel", "details": str(ex)}, 500
 
 
+def _marksheet_cells(m):
+    """
+    The 8 marksheet values of one mark in MARKSHEET_COLUMNS order. TOT and AVG
+    fall back to the component sum and half of it when not stored (or 0).
+    """
+    parts = (m.unit1, m.term, m.unit2, m.internal, m.annual)
+    tot = m.tot or sum(p or 0 for p in parts)
+    avg = m.sub_avg or round(tot / 2)
+    # Missing components print as blank cells; only the output is coalesced
+    return [*('' if p is None else p for p in parts), tot, avg, '' if m.grace is None else m.grace]
+
+
 @admin_bp.route('/excel/marksheet', methods=['GET'])
 @token_required
 @admin_required
@@ -889,171 +1100,144 @@ def download_marksheet(user_id=None, user_type=None):
     division = request.args.get('division')
     if not division:
         return {"error": "division is required"}, 400
-
-    # Ensure computed results exist
-    try:
-        generate_results_for_division(division)
-    except Exception:
-        pass
-
-    # Load students for division
-    students = Student.query.filter_by(division=division).order_by(Student.roll_no).all()
-    if not students:
-        return {"error": "No students found for division"}, 404
-
-    # Fixed subject order required by spec
-    SUBJECT_ORDER = [
-        ('ENGLISH', ['ENG']),
-        ('OC', ['OC']),
-        ('SP / MATHS', ['SP', 'MATHS']),
-        ('ECONOMICS', ['ECO']),
-        ('B.K. & A/C', ['BK']),
-    ]
+    if openpyxl is None:
+        return {"error": "Server missing Excel support (openpyxl)"}, 500
+
+    # Ensure computed results exist and reflect the latest marks
+    try_ensure_results_for_division(division)
+
+    # Plain rows instead of ORM objects: the sheet only reads a few columns.
+    # Marks are loaded first because the student query below streams, and a
+    # streaming (server-side) cursor must be drained before the next query.
+    marks_by_student = {}
+    mark_rows = db.session.execute(
+        select(
+            Mark.roll_no, Mark.subject_id, Mark.unit1, Mark.term, Mark.unit2,
+            Mark.internal, Mark.annual, Mark.tot, Mark.sub_avg, Mark.grace,
+        ).where(Mark.division == division)
+    )
+    for m in mark_rows:
+        marks_by_student.setdefault(m.roll_no, {})[m.subject_id] = m
 
     # Map subject_code -> Subject object
-    all_subjects = Subject.query.filter_by(active=True).all()
+    all_subjects = active_subjects()
     subjects_by_code = {s.subject_code.upper(): s for s in all_subjects}
 
-    def resolve_optional_subject(student, candidates):
+    def resolve_optional_subject(opts, candidates):
         # Check student's optional_subject then optional_subject_2
-        for opt in (student.optional_subject, student.optional_subject_2):
+        for opt in opts:
             if opt and opt.upper() in candidates:
                 return subjects_by_code.get(opt.upper())
         # fallback: any available candidate in DB
         for c in candidates:
-            if c.upper() in subjects_by_code:
-                return subjects_by_code[c.upper()]
+            if c in subjects_by_code:
+                return subjects_by_code[c]
         return None
 
+    # A student's row layout depends only on which subject fills each block,
+    # and only the SP / MATHS block varies (with the optional subjects). So
+    # resolve the whole layout once per distinct (optional_subject,
+    # optional_subject_2) pair: a subject_id per block, None for no subject.
+    def subject_plan(opts):
+        plan = []
+        for subj_label, candidates in MARKSHEET_SUBJECT_ORDER:
+            if subj_label == 'SP / MATHS':
+                subj_obj = resolve_optional_subject(opts, candidates)
+            else:
+                subj_obj = next((subjects_by_code[c] for c in candidates if c in subjects_by_code), None)
+            plan.append(subj_obj.subject_id if subj_obj else None)
+        return tuple(plan)
+
+    plans = {
+        tuple(opts): subject_plan(tuple(opts))
+        for opts in db.session.execute(
+            select(Student.optional_subject, Student.optional_subject_2)
+            .where(Student.division == division)
+            .distinct()
+        )
+    }
+    if not plans:
+        return {"error": "No students found for division"}, 404
+
+    # Everything else is loaded above: the student select streams over a
+    # server-side cursor, and no other query may run until it is drained.
+    students = db.session.execute(
+        select(Student.roll_no, Student.name, Student.optional_subject, Student.optional_subject_2)
+        .where(Student.division == division)
+        .order_by(Student.roll_no)
+        .execution_options(yield_per=200)
+    )
+
     # Build workbook
     try:
-        from openpyxl import Workbook
-        from openpyxl.styles import Alignment, Font
-
-        wb = Workbook()
-        ws = cast(Any, wb.active)
-        ws.title = 'Marksheet'
+        # write_only streams rows to the file instead of keeping a Cell object
+        # per value; merges are declared up front and rows appended in order.
+        wb = openpyxl.Workbook(write_only=True)
+        ws = cast(Any, wb.create_sheet('Marksheet'))
+
+        def styled(value, font=None, alignment=None):
+            cell = WriteOnlyCell(ws, value=value)
+            if font is not None:
+                cell.font = font
+            if alignment is not None:
+                cell.alignment = alignment
+            return cell
 
         # columns: 2 ID columns + 5 subjects * 8 internal cols
-        total_cols = 2 + len(SUBJECT_ORDER) * 8
+        total_cols = 2 + len(MARKSHEET_SUBJECT_ORDER) * len(MARKSHEET_COLUMNS)
 
         # Top headers (merged)
-        ws.merge_cells(start_row=1, start_column=1, end_row=1, end_column=total_cols)
-        ws.cell(row=1, column=1, value='SIES COLLEGE OF COMMERCE, NERUL')
-        ws.cell(row=1, column=1).font = Font(bold=True)
-        ws.cell(row=1, column=1).alignment = Alignment(horizontal='center')
+        ws.merged_cells.add(f'A1:{get_column_letter(total_cols)}1')
+        ws.append([styled('SIES COLLEGE OF COMMERCE, NERUL', BOLD, CENTER)])
 
-        ws.merge_cells(start_row=2, start_column=1, end_row=2, end_column=total_cols)
+        ws.merged_cells.add(f'A2:{get_column_letter(total_cols)}2')
         title = f'FYJC (DIV {division}) MARKSHEET – 2024–2025'
-        ws.cell(row=2, column=1, value=title)
-        ws.cell(row=2, column=1).font = Font(bold=True)
-        ws.cell(row=2, column=1).alignment = Alignment(horizontal='center')
+        ws.append([styled(title, BOLD, CENTER)])
 
         # Row 3 right-aligned stream text
-        ws.cell(row=3, column=total_cols, value='B.K. & A/C')
-        ws.cell(row=3, column=total_cols).alignment = Alignment(horizontal='right')
+        ws.append([None] * (total_cols - 1) + [styled('B.K. & A/C', alignment=RIGHT)])
 
         # Header rows: row4 merged subject headers, row5 internal headers
-        ws.merge_cells(start_row=4, start_column=1, end_row=5, end_column=1)
-        ws.cell(row=4, column=1, value='ROLL NO')
-        ws.cell(row=4, column=1).font = Font(bold=True)
-        ws.cell(row=4, column=1).alignment = Alignment(horizontal='center', vertical='center')
+        ws.merged_cells.add('A4:A5')
+        ws.merged_cells.add('B4:B5')
+        header_row = [styled('ROLL NO', BOLD, CENTER_V), styled('STUDENT NAME', BOLD, CENTER_V)]
+        internal_row = [None, None]
 
-        ws.merge_cells(start_row=4, start_column=2, end_row=5, end_column=2)
-        ws.cell(row=4, column=2, value='STUDENT NAME')
-        ws.cell(row=4, column=2).font = Font(bold=True)
-        ws.cell(row=4, column=2).alignment = Alignment(horizontal='center', vertical='center')
-
-        internal_headers = ['UNIT I', 'TERM I', 'UNIT II', 'INT', 'ANNUAL', 'TOT', 'AVG', 'GRACE']
         col = 3
-        for subj_label, candidates in SUBJECT_ORDER:
+        for subj_label, candidates in MARKSHEET_SUBJECT_ORDER:
             start = col
-            end = col + len(internal_headers) - 1
-            ws.merge_cells(start_row=4, start_column=start, end_row=4, end_column=end)
-            ws.cell(row=4, column=start, value=subj_label)
-            ws.cell(row=4, column=start).font = Font(bold=True)
-            ws.cell(row=4, column=start).alignment = Alignment(horizontal='center')
-            for i, h in enumerate(internal_headers):
-                c = ws.cell(row=5, column=start + i, value=h)
-                c.font = Font(bold=True)
-                c.alignment = Alignment(horizontal='center')
-            col += len(internal_headers)
+            end = col + len(MARKSHEET_COLUMNS) - 1
+            ws.merged_cells.add(f'{get_column_letter(start)}4:{get_column_letter(end)}4')
+            header_row.append(styled(subj_label, BOLD, CENTER))
+            header_row.extend([None] * (len(MARKSHEET_COLUMNS) - 1))
+            internal_row.extend(styled(h, BOLD, CENTER) for h in MARKSHEET_COLUMNS)
+            col += len(MARKSHEET_COLUMNS)
+        ws.append(header_row)
+        ws.append(internal_row)
 
         # Row 6: Maximum marks
-        max_row = 6
-        ws.cell(row=max_row, column=1, value='')
-        ws.cell(row=max_row, column=2, value='')
-        max_values = [25, 50, 25, 20, 80, 200, 100, '']
-        col = 3
-        for _ in SUBJECT_ORDER:
-            for mv in max_values:
-                ws.cell(row=max_row, column=col, value=mv)
-                ws.cell(row=max_row, column=col).alignment = Alignment(horizontal='center')
-                col += 1
-
-        # Student rows
-        row_idx = 7
+        ws.append(['', ''] + [styled(mv, alignment=CENTER) for mv in MARKSHEET_MAX_ROW])
+
+        blank = [''] * len(MARKSHEET_COLUMNS)
+
+        # Student rows: build each row as a list and append it in one call
         for s in students:
-            ws.cell(row=row_idx, column=1, value=s.roll_no)
-            ws.cell(row=row_idx, column=2, value=s.name)
-            col = 3
-            for subj_label, candidates in SUBJECT_ORDER:
-                # resolve subject
-                if subj_label == 'SP / MATHS':
-                    subj_obj = resolve_optional_subject(s, [c.upper() for c in candidates])
-                else:
-                    subj_obj = None
-                    for code in candidates:
-                        if code.upper() in subjects_by_code:
-                            subj_obj = subjects_by_code[code.upper()]
-                            break
-
-                if not subj_obj:
-                    # leave 8 blank cells
-                    for i in range(8):
-                        ws.cell(row=row_idx, column=col + i, value='')
-                    col += 8
+            plan = plans[(s.optional_subject, s.optional_subject_2)]
+
+            row = [s.roll_no, s.name]
+            marks_by_subject = marks_by_student.get(s.roll_no, {})
+            for subject_id in plan:
+                if subject_id is None:
+                    # no such subject: leave the block blank and unstyled
+                    row.extend(blank)
                     continue
+                m = marks_by_subject.get(subject_id)
+                values = _marksheet_cells(m) if m else blank
+                row.extend(styled(v, alignment=CENTER) for v in values)
 
-                m = Mark.query.filter_by(roll_no=s.roll_no, division=s.division, subject_id=subj_obj.subject_id).first()
-                if m:
-                    unit1 = m.unit1 if m.unit1 is not None else ''
-                    term = m.term if m.term is not None else ''
-                    unit2 = m.unit2 if m.unit2 is not None else ''
-                    internal = m.internal if m.internal is not None else ''
-                    annual = m.annual if m.annual is not None else ''
-                    # TOT and AVG per rules
-                    if m.tot is not None and m.tot != 0:
-                        tot = m.tot
-                    else:
-                        try:
-                            tot = (m.unit1 or 0) + (m.term or 0) + (m.unit2 or 0) + (m.internal or 0) + (m.annual or 0)
-                        except Exception:
-                            tot = ''
-                    if m.sub_avg is not None and m.sub_avg != 0:
-                        avg = m.sub_avg
-                    else:
-                        try:
-                            avg = round(float(tot) / 2) if tot != '' else ''
-                        except Exception:
-                            avg = ''
-                    grace = m.grace if m.grace is not None else ''
-                else:
-                    unit1 = term = unit2 = internal = annual = tot = avg = grace = ''
-
-                values = [unit1, term, unit2, internal, annual, tot, avg, grace]
-                for i, v in enumerate(values):
-                    cell = ws.cell(row=row_idx, column=col + i, value=v)
-                    cell.alignment = Alignment(horizontal='center')
-                col += 8
-
-            row_idx += 1
+            ws.append(row)
 
-        bio = BytesIO()
-        wb.save(bio)
-        bio.seek(0)
-        filename = f'marksheet_div_{division}.xlsx'
-        return send_file(bio, download_name=filename, as_attachment=True)
+        return _send_workbook(wb, f'marksheet_div_{division}.xlsx')
     except Exception as ex:
         return {"error": "Failed to generate marksheet", "details": str(ex)}, 500
 
@@ -1070,78 +1254,25 @@ def student_marksheet_pdf(roll_no, user_id=None, user_type=None):
         return {"error": "division is required"}, 400
 
     # ensure results are up-to-date
-    try:
-        generate_results_for_division(division)
-    except Exception:
-        pass
+    try_ensure_results_for_division(division)
 
-    res = Result.query.filter_by(roll_no=roll_no, division=division).first()
+    res = Result.query.options(_result_cols).filter_by(roll_no=roll_no, division=division).first()
     if not res:
         return {"error": "Result not found"}, 404
 
-    if canvas_module is None or letter is None:
+    if not HAVE_REPORTLAB:
         return {"error": "reportlab not installed on server. Install reportlab in requirements."}, 501
 
-    buf = BytesIO()
-    # canvas_module is the imported reportlab.pdfgen.canvas module
-    CanvasClass = getattr(canvas_module, 'Canvas', None)
-    if CanvasClass is None:
-        return {"error": "reportlab canvas API not available"}, 501
-    c = CanvasClass(buf, pagesize=cast(Any, letter))
-    width, height = cast(Any, letter)
-
-    # Header
-    c.setFont('Helvetica-Bold', 16)
-    c.drawString(40, height - 50, 'Official Marksheet')
-    c.setFont('Helvetica', 12)
-    c.drawString(40, height - 70, f'Name: {res.name}  |  Roll: {res.roll_no}  |  Division: {res.division}')
-
-    # Table header
-    y = height - 110
-    c.setFont('Helvetica-Bold', 11)
-    c.drawString(40, y, 'Subject')
-    c.drawString(260, y, 'Annual')
-    c.drawString(360, y, 'Grace')
-    c.drawString(460, y, 'Final')
-    c.setFont('Helvetica', 11)
-    y -= 18
-
-    # iterate known subjects and map to result fields
-    mapping = [
-        ('ENG', 'eng_avg', 'eng_grace'),
-        ('ECO', 'eco_avg', 'eco_grace'),
-        ('BK', 'bk_avg', 'bk_grace'),
-        ('OC', 'oc_avg', 'oc_grace'),
-        ('HINDI', 'hindi_avg', 'hindi_grace'),
-        ('IT', 'it_avg', 'it_grace'),
-        ('MATHS', 'maths_avg', 'maths_grace'),
-        ('SP', 'sp_avg', 'sp_grace')
-    ]
-
-    total = 0
-    for code, avg_field, grace_field in mapping:
-        avg = getattr(res, avg_field, None)
-        grace = getattr(res, grace_field, 0) or 0
+    lines = []
+    for code, get_avg, get_grace in PDF_RESULT_GETTERS:
+        avg = get_avg(res)
         if avg is None:
             continue
-        final = (avg or 0) + (grace or 0)
-        c.drawString(40, y, code)
-        c.drawRightString(320, y, f'{round(avg,2)}')
-        c.drawRightString(420, y, f'{round(grace,2)}')
-        c.drawRightString(520, y, f'{round(final,2)}')
-        total += final
-        y -= 16
-
-    y -= 8
-    c.setFont('Helvetica-Bold', 12)
-    c.drawString(40, y, f'Total: {round(res.percentage * (len(mapping) / len(mapping)),2) if res.percentage is not None else "-"}')
-    c.drawRightString(520, y, f'Percentage: {res.percentage or "-"}')
-
-    c.showPage()
-    c.save()
-    buf.seek(0)
+        lines.append((code, avg, get_grace(res) or 0))
 
-    return send_file(buf, mimetype='application/pdf', as_attachment=True, download_name=f'{roll_no}_marksheet.pdf')
+    # Drawn inline: a worker pool would still block this request on the result
+    pdf = render_marksheet(res.name, res.roll_no, res.division, lines, res.percentage)
+    return _send_bytes(pdf, f'{roll_no}_marksheet.pdf', 'application/pdf')
 
 
 
@@ -1155,18 +1286,11 @@ def list_teachers(user_id=None, user_type=None):
     if user_type != "ADMIN":
         return {"error": "Unauthorized"}, 403
 
-    teachers = Teacher.query.all()
-    return jsonify([
-        {
-            "teacher_id": t.teacher_id,
-            "name": t.name,
-            "userid": t.userid,
-            "email": t.email,
-            "active": t.active,
-            "role": t.role
-        }
-        for t in teachers
-    ]), 200
+    # Plain rows: skips building Teacher instances (and the password hash) per row
+    rows = db.session.query(
+        Teacher.teacher_id, Teacher.name, Teacher.userid, Teacher.email, Teacher.active, Teacher.role
+    ).all()
+    return jsonify([r._asdict() for r in rows]), 200
 
 
 @admin_bp.route("/teachers", methods=["POST"])
@@ -1189,7 +1313,7 @@ def add_teacher(user_id=None, user_type=None):
         email=data.get("email"),
         role=data.get("role", "TEACHER"),
         active=True,
-        password_hash=generate_password_hash(data["password"])
+        password_hash=hash_password(data["password"])
     )
 
     db.session.add(teacher)
@@ -1213,7 +1337,7 @@ def update_teacher(teacher_id, user_id=None, user_type=None):
     teacher.active = data.get("active", teacher.active)
 
     if data.get("password"):
-        teacher.password_hash = generate_password_hash(data["password"])
+        teacher.password_hash = hash_password(data["password"])
 
     db.session.commit()
     return {"message": "Teacher updated"}, 200
@@ -1244,18 +1368,15 @@ def admin_login():
     if not userid or not password:
         return {"error": "userid and password required"}, 400
 
-    admin = None
-    from models import Admin
-    admin = Admin.query.filter_by(username=userid, active=True).first()
-    if not admin:
+    creds = admin_credentials(userid)
+    if not creds:
         return {"error": "Invalid credentials"}, 401
 
-    # Admin passwords are hashed with werkzeug.generate_password_hash
-    from werkzeug.security import check_password_hash
-    if not check_password_hash(admin.password_hash, password):
+    admin_id, password_hash = creds
+    if not verify_password(password, password_hash):
         return {"error": "Invalid credentials"}, 401
 
-    token = generate_token(admin.admin_id, "ADMIN")
+    token = generate_token(admin_id, "ADMIN")
     # Return role in lowercase for consistency with client/tests
     return {"token": token, "role": "admin"}, 200
 
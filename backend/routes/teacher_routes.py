@@ -1,6 +1,7 @@
 # backend/routes/teacher_routes.py
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
+from sqlalchemy import and_, distinct, exists, func, insert, select
 
 from app import db
 from typing import Any, Dict, cast
@@ -8,12 +9,15 @@ from models import (
     Student,
     Subject,
     Mark,
+    Result,
     TeacherSubjectAllocation
 )
-from services.result_service import generate_results_for_division
+from services.result_service import try_ensure_results_for_division
+from services.subject_service import active_subjects
+from services.allocation_service import teacher_has_division
 from schemas import EnterMarkSchema, UpdateMarkSchema
 from auth import token_required
-from config import GRACE_MAX
+from config import CONFIG
 import io
 from typing import TYPE_CHECKING
 
@@ -32,43 +36,132 @@ enter_mark_schema = EnterMarkSchema()
 update_mark_schema = UpdateMarkSchema()
 
 
+# (subject code, Result avg column, Result grace column)
+_CORE_FIELDS = (
+    ("ENG", "eng_avg", "eng_grace"),
+    ("ECO", "eco_avg", "eco_grace"),
+    ("BK", "bk_avg", "bk_grace"),
+    ("OC", "oc_avg", "oc_grace"),
+)
+_OPT_FIELDS = (
+    ("HINDI", "hindi_avg", "hindi_grace"),
+    ("IT", "it_avg", "it_grace"),
+    ("MATHS", "maths_avg", "maths_grace"),
+    ("SP", "sp_avg", "sp_grace"),
+)
+
+# The Result columns named above that exist (Result has no ECO columns)
+_RESULT_SUBJECT_COLS = tuple(
+    getattr(Result, name)
+    for _, avg_key, grace_key in _CORE_FIELDS + _OPT_FIELDS
+    for name in (avg_key, grace_key)
+    if hasattr(Result, name)
+)
+
+
+def _complete_table_row(seq, s):
+    """One /complete-table entry from a Student LEFT JOIN Result row."""
+    # None when the student has no Result row yet
+    result = s._mapping if s.result_id is not None else None
+
+    # build per-subject entries from Result columns
+    subject_entries = []
+    total_avg = 0
+    total_grace = 0
+
+    for code, avg_key, grace_key in _CORE_FIELDS:
+        avg = result.get(avg_key) if result else None
+        grace = result.get(grace_key, 0) if result else 0
+        final = None
+        if avg is not None:
+            final = (avg or 0) + (grace or 0)
+            total_avg += avg or 0
+            total_grace += grace or 0
+
+        subject_entries.append({"code": code, "avg": avg, "grace": grace, "final": final})
+
+    # optional subjects
+    for code, avg_key, grace_key in _OPT_FIELDS:
+        # only include if student takes this optional
+        include = False
+        if code in ("HINDI", "IT") and s.optional_subject == code:
+            include = True
+        if code in ("MATHS", "SP") and s.optional_subject_2 == code:
+            include = True
+
+        if include:
+            avg = result.get(avg_key) if result else None
+            grace = result.get(grace_key, 0) if result else 0
+            final = None
+            if avg is not None:
+                final = (avg or 0) + (grace or 0)
+                total_avg += avg or 0
+                total_grace += grace or 0
+
+            subject_entries.append({"code": code, "avg": avg, "grace": grace, "final": final})
+
+    final_total = None
+    if subject_entries:
+        final_total = total_avg + total_grace
+
+    return {
+        "seq": seq,
+        "roll_no": s.roll_no,
+        "name": s.name,
+        "subjects": subject_entries,
+        "total_avg": round(total_avg, 2),
+        "total_grace": round(total_grace, 2),
+        "final_total": round(final_total, 2) if final_total is not None else None,
+        "percentage": s.percentage
+    }
+
+
+def _cell_text(value):
+    """Excel cell value as a stripped string; '' for empty cells."""
+    return '' if value is None else str(value).strip()
+
+
 # ======================================================
 # Helper: check teacher allocation
 # ======================================================
 def _check_teacher_allocation(teacher_id, subject_id, division):
-    return TeacherSubjectAllocation.query.filter_by(
-        teacher_id=teacher_id,
-        subject_id=subject_id,
-        division=division
-    ).first()
+    # EXISTS: callers only need to know whether the allocation is there
+    return db.session.query(
+        exists().where(
+            TeacherSubjectAllocation.teacher_id == teacher_id,
+            TeacherSubjectAllocation.subject_id == subject_id,
+            TeacherSubjectAllocation.division == division,
+        )
+    ).scalar()
 
 
 # ======================================================
 # Helpers: determine if all marks for a subject/division exist
 # ======================================================
-def _eligible_student_count_for_subject(subject_id, division):
-    subject = Subject.query.get(subject_id)
+def _submission_counts(subject_id, division):
+    """
+    (eligible students, marks entered) for a subject in a division, counted
+    in one round-trip. Students only count for an optional subject they chose.
+    """
+    subject = db.session.get(Subject, subject_id)
     if not subject:
-        return 0
+        return 0, 0
 
-    query = Student.query.filter_by(division=division)
+    eligible = select(func.count(Student.student_id)).where(Student.division == division)
     if subject.subject_code in ("HINDI", "IT"):
-        query = query.filter(Student.optional_subject == subject.subject_code)
+        eligible = eligible.where(Student.optional_subject == subject.subject_code)
     if subject.subject_code in ("MATHS", "SP"):
-        query = query.filter(Student.optional_subject_2 == subject.subject_code)
-
-    return query.count()
-
+        eligible = eligible.where(Student.optional_subject_2 == subject.subject_code)
+    entered = select(func.count(Mark.mark_id)).where(Mark.subject_id == subject_id, Mark.division == division)
 
-def _marks_count_for_subject(subject_id, division):
-    return Mark.query.filter_by(subject_id=subject_id, division=division).count()
+    return tuple(db.session.execute(select(eligible.scalar_subquery(), entered.scalar_subquery())).one())
 
 
 def _are_all_marks_submitted(subject_id, division):
-    eligible = _eligible_student_count_for_subject(subject_id, division)
+    eligible, entered = _submission_counts(subject_id, division)
     if eligible == 0:
         return False
-    return _marks_count_for_subject(subject_id, division) >= eligible
+    return entered >= eligible
 
 
 # ======================================================
@@ -183,8 +276,8 @@ def enter_marks(user_id=None, user_type=None):
         return {"error": "Terminal marks must be between 0 and 50"}, 400
     if annual < 0 or annual > 100:
         return {"error": "Annual marks must be between 0 and 100"}, 400
-    if grace < 0 or grace > GRACE_MAX:
-        return {"error": f"Grace must be between 0 and {GRACE_MAX}"}, 400
+    if grace < 0 or grace > CONFIG.GRACE_MAX:
+        return {"error": f"Grace must be between 0 and {CONFIG.GRACE_MAX}"}, 400
 
     # Grace is optional and may be provided at any time; limit enforced above.
 
@@ -249,8 +342,8 @@ def update_marks(mark_id, user_id=None, user_type=None):
         return {"error": "Terminal marks must be between 0 and 50"}, 400
     if annual < 0 or annual > 100:
         return {"error": "Annual marks must be between 0 and 100"}, 400
-    if grace < 0 or grace > GRACE_MAX:
-        return {"error": f"Grace must be between 0 and {GRACE_MAX}"}, 400
+    if grace < 0 or grace > CONFIG.GRACE_MAX:
+        return {"error": f"Grace must be between 0 and {CONFIG.GRACE_MAX}"}, 400
 
     tot = unit1 + unit2 + term + annual
     sub_avg = round(tot / 2, 2)
@@ -268,19 +361,14 @@ def update_marks(mark_id, user_id=None, user_type=None):
         g = data.get("grace", mark.grace)
         if g is None:
             g = 0
-        if float(g) < 0 or float(g) > GRACE_MAX:
-            return {"error": f"Grace must be between 0 and {GRACE_MAX}"}, 400
+        if float(g) < 0 or float(g) > CONFIG.GRACE_MAX:
+            return {"error": f"Grace must be between 0 and {CONFIG.GRACE_MAX}"}, 400
         mark.grace = g
 
     db.session.commit()
 
-    # regenerate results for the division to reflect changes immediately
-    try:
-        generate_results_for_division(mark.division)
-    except Exception:
-        # do not break the update if result generation fails; log in production
-        pass
-
+    # results are regenerated by the next reader of this division, which
+    # sees the changed marks in the inputs fingerprint
     return {"message": "Marks updated successfully"}, 200
 
 
@@ -299,7 +387,7 @@ def list_marks(user_id=None, user_type=None):
         return {"error": "subject_id and division are required"}, 400
 
     # ensure teacher allocation
-    alloc = TeacherSubjectAllocation.query.filter_by(teacher_id=user_id, subject_id=subject_id, division=division).first()
+    alloc = _check_teacher_allocation(user_id, subject_id, division)
     if not alloc and user_type != "ADMIN":
         return {"error": "Not authorized for this subject/division"}, 403
 
@@ -349,12 +437,8 @@ def delete_mark(mark_id, user_id=None, user_type=None):
     db.session.delete(mark)
     db.session.commit()
 
-    # regenerate results for the division
-    try:
-        generate_results_for_division(mark.division)
-    except Exception:
-        pass
-
+    # results are regenerated by the next reader of this division, which
+    # sees the changed marks in the inputs fingerprint
     return {"message": "Marks deleted"}, 200
 
 
@@ -370,90 +454,41 @@ def view_complete_table(user_id=None, user_type=None):
         return {"error": "division is required"}, 400
 
     # Ensure teacher is authorized for this division (has any allocation)
-    alloc = TeacherSubjectAllocation.query.filter_by(teacher_id=user_id, division=division).first()
-    if not alloc and user_type != "ADMIN":
+    if user_type != "ADMIN" and not teacher_has_division(user_id, division):
         return {"error": "Not authorized for this division"}, 403
 
-    # regenerate results to ensure latest values
-    try:
-        generate_results_for_division(division)
-    except Exception:
-        pass
-
-    # fetch students in canonical order and build rows
-    students = Student.query.filter_by(division=division).order_by(Student.roll_no).all()
-    subjects = {s.subject_id: s.subject_code for s in Subject.query.all()}
+    # regenerate results only if the division's marks changed since last time
+    try_ensure_results_for_division(division)
 
-    rows = []
-    for idx, s in enumerate(students, start=1):
-        result = None
-        from models import Result
-        result = Result.query.filter_by(roll_no=s.roll_no, division=s.division).first()
-
-        # build per-subject entries from Result columns
-        subject_entries = []
-        total_avg = 0
-        total_grace = 0
-
-        for code, field in {
-            "ENG": "eng",
-            "ECO": "eco",
-            "BK": "bk",
-            "OC": "oc",
-        }.items():
-            avg = getattr(result, f"{field}_avg", None) if result else None
-            grace = getattr(result, f"{field}_grace", 0) if result else 0
-            final = None
-            if avg is not None:
-                final = (avg or 0) + (grace or 0)
-                total_avg += avg or 0
-                total_grace += grace or 0
+    # fetch students in canonical order with their Result columns as plain
+    # rows (Student LEFT JOIN Result); no ORM instances are built
+    stmt = (
+        select(
+            Student.roll_no, Student.name, Student.optional_subject, Student.optional_subject_2,
+            Result.result_id, Result.percentage, *_RESULT_SUBJECT_COLS,
+        )
+        .outerjoin(Result, and_(Result.roll_no == Student.roll_no, Result.division == Student.division))
+        .where(Student.division == division)
+        .order_by(Student.roll_no)
+    )
 
-            subject_entries.append({"code": code, "avg": avg, "grace": grace, "final": final})
+    # Stream the array row by row, fetching from the DB in chunks, so a
+    # large division is never held in memory as one list
+    rows = db.session.execute(stmt.execution_options(yield_per=500))
 
-        # optional subjects
-        for code, field in {"HINDI": "hindi", "IT": "it", "MATHS": "maths", "SP": "sp"}.items():
-            # only include if student takes this optional
-            include = False
-            if code in ("HINDI", "IT") and s.optional_subject == code:
-                include = True
-            if code in ("MATHS", "SP") and s.optional_subject_2 == code:
-                include = True
-
-            if include:
-                avg = getattr(result, f"{field}_avg", None) if result else None
-                grace = getattr(result, f"{field}_grace", 0) if result else 0
-                final = None
-                if avg is not None:
-                    final = (avg or 0) + (grace or 0)
-                    total_avg += avg or 0
-                    total_grace += grace or 0
-
-                subject_entries.append({"code": code, "avg": avg, "grace": grace, "final": final})
-
-        final_total = None
-        if subject_entries:
-            final_total = total_avg + total_grace
+    def generate():
+        yield "["
+        for idx, s in enumerate(rows, start=1):
+            yield ("," if idx > 1 else "") + current_app.json.dumps(_complete_table_row(idx, s))
+        yield "]"
 
-        rows.append({
-            "seq": idx,
-            "roll_no": s.roll_no,
-            "name": s.name,
-            "subjects": subject_entries,
-            "total_avg": round(total_avg, 2),
-            "total_grace": round(total_grace, 2),
-            "final_total": round(final_total, 2) if final_total is not None else None,
-            "percentage": getattr(result, "percentage", None) if result else None
-        })
-
-    return jsonify(rows), 200
+    return Response(stream_with_context(generate()), mimetype="application/json"), 200
 
 
 @teacher_bp.route('/divisions', methods=['GET'])
 @token_required
 def list_divisions(user_id=None, user_type=None):
     """Return all distinct divisions present in students table."""
-    from sqlalchemy import distinct
     divs = [d[0] for d in db.session.query(distinct(Student.division)).all()]
     return jsonify(sorted([d for d in divs if d is not None])), 200
 
@@ -542,15 +577,12 @@ def marks_from_excel(user_id=None, user_type=None):
     for r in rows_iter:
         if not r or all(c is None for c in r):
             continue
-        roll_val = r[roll_idx] if roll_idx is not None and roll_idx < len(r) else None
-        if roll_val is None or str(roll_val).strip() == '':
+        roll = _cell_text(r[roll_idx] if roll_idx is not None and roll_idx < len(r) else None)
+        if not roll:
             continue
-        roll = str(roll_val).strip()
         division = None
         if div_idx is not None and div_idx < len(r):
-            dv = r[div_idx]
-            if dv is not None and str(dv).strip() != '':
-                division = str(dv).strip()
+            division = _cell_text(r[div_idx]) or None
         if not division and default_division:
             division = default_division
 
@@ -560,9 +592,7 @@ def marks_from_excel(user_id=None, user_type=None):
         # optional subject cell
         subject_val = None
         if subj_idx is not None and subj_idx < len(r):
-            sv = r[subj_idx]
-            if sv is not None and str(sv).strip() != '':
-                subject_val = str(sv).strip()
+            subject_val = _cell_text(r[subj_idx]) or None
 
         # optional marks columns
         def val_at_idx(ix):
@@ -677,7 +707,28 @@ def batch_upsert_marks(user_id=None, user_type=None):
 
     errors = []
     saved = []
-    divisions_to_regen = set()
+
+    # Load the students, allocations and existing marks every entry may touch
+    # up front instead of three lookups per entry.
+    rolls = {str(e.get('roll_no') or e.get('roll')) for e in entries}
+    divisions = {e.get('division') for e in entries}
+    known_students = set(
+        db.session.query(Student.roll_no, Student.division)
+        .filter(Student.roll_no.in_(rolls), Student.division.in_(divisions))
+        .all()
+    )
+    allocated = set(
+        db.session.query(TeacherSubjectAllocation.subject_id, TeacherSubjectAllocation.division)
+        .filter_by(teacher_id=user_id)
+        .all()
+    )
+    existing_marks = {
+        (m.roll_no, m.division, m.subject_id): m
+        for m in Mark.query.filter(Mark.roll_no.in_(rolls), Mark.division.in_(divisions))
+    }
+    # New marks keyed like existing_marks so a repeated entry updates the
+    # pending row; inserted in one executemany after validation.
+    new_marks = {}
 
     for idx, e in enumerate(entries, start=1):
         roll = e.get('roll_no') or e.get('roll')
@@ -687,13 +738,11 @@ def batch_upsert_marks(user_id=None, user_type=None):
             errors.append({"index": idx, "error": "roll_no, division and subject_id are required"})
             continue
 
-        student = Student.query.filter_by(roll_no=str(roll), division=division).first()
-        if not student:
+        if (str(roll), division) not in known_students:
             errors.append({"index": idx, "roll_no": roll, "division": division, "error": "student not found"})
             continue
 
-        alloc = _check_teacher_allocation(user_id, int(subject_id), division)
-        if not alloc and user_type != 'ADMIN':
+        if (int(subject_id), division) not in allocated and user_type != 'ADMIN':
             errors.append({"index": idx, "roll_no": roll, "division": division, "error": "not authorized for subject/division"})
             continue
 
@@ -707,11 +756,12 @@ def batch_upsert_marks(user_id=None, user_type=None):
             errors.append({"index": idx, "roll_no": roll, "error": "invalid numeric value"})
             continue
 
-        if unit1 < 0 or unit1 > 25 or unit2 < 0 or unit2 > 25 or term < 0 or term > 50 or annual < 0 or annual > 100 or grace < 0 or grace > GRACE_MAX:
+        if unit1 < 0 or unit1 > 25 or unit2 < 0 or unit2 > 25 or term < 0 or term > 50 or annual < 0 or annual > 100 or grace < 0 or grace > CONFIG.GRACE_MAX:
             errors.append({"index": idx, "roll_no": roll, "division": division, "error": "one or more marks out of allowed ranges"})
             continue
 
-        existing = Mark.query.filter_by(roll_no=str(roll), division=division, subject_id=int(subject_id)).first()
+        key = (str(roll), division, int(subject_id))
+        existing = existing_marks.get(key)
         tot = unit1 + unit2 + term + annual
         sub_avg = round(tot / 2, 2)
         if existing:
@@ -723,38 +773,27 @@ def batch_upsert_marks(user_id=None, user_type=None):
             existing.sub_avg = sub_avg
             existing.grace = grace
         else:
-            m = Mark()
-            m.roll_no = str(roll)
-            m.division = division
-            m.subject_id = int(subject_id)
-            m.unit1 = unit1
-            m.unit2 = unit2
-            m.term = term
-            m.annual = annual
-            m.tot = tot
-            m.sub_avg = sub_avg
-            m.grace = grace
-            m.entered_by = user_id
-            db.session.add(m)
-
-        divisions_to_regen.add(division)
+            row = new_marks.setdefault(key, {
+                "roll_no": key[0],
+                "division": division,
+                "subject_id": key[2],
+                "entered_by": user_id,
+            })
+            row.update(unit1=unit1, unit2=unit2, term=term, annual=annual, tot=tot, sub_avg=sub_avg, grace=grace)
+
         saved.append({"roll_no": str(roll), "division": division, "subject_id": int(subject_id)})
 
     if errors:
         return {"error": "Validation failed for some rows", "details": errors}, 400
 
     try:
+        if new_marks:
+            db.session.execute(insert(Mark), list(new_marks.values()))
         db.session.commit()
     except Exception as ex:
         db.session.rollback()
         return {"error": "Database commit failed", "details": str(ex)}, 500
 
-    for d in divisions_to_regen:
-        try:
-            generate_results_for_division(d)
-        except Exception:
-            pass
-
     return {"message": "Marks saved successfully", "saved": saved}, 200
 
 
@@ -813,17 +852,16 @@ def upload_apply_excel(user_id=None, user_type=None):
     for r in rows_iter:
         if not r or all(c is None for c in r):
             continue
-        roll_val = r[indices['roll']] if indices['roll'] is not None and indices['roll'] < len(r) else None
-        if roll_val is None or str(roll_val).strip() == '':
+        roll = _cell_text(r[indices['roll']] if indices['roll'] is not None and indices['roll'] < len(r) else None)
+        if not roll:
             continue
-        roll = str(roll_val).strip()
         division = r[indices['division']] if indices['division'] is not None and indices['division'] < len(r) else None
         division = str(division).strip() if division is not None else None
 
         subj_val = r[indices['subject']] if indices['subject'] is not None and indices['subject'] < len(r) else None
         subject_id = None
-        if subj_val is not None and str(subj_val).strip() != '':
-            sv = str(subj_val).strip()
+        sv = _cell_text(subj_val)
+        if sv:
             try:
                 if sv.isdigit():
                     subject_id = int(sv)
@@ -912,7 +950,7 @@ def upload_apply_excel(user_id=None, user_type=None):
             continue
 
         # range checks
-        if u1 < 0 or u1 > 25 or u2 < 0 or u2 > 25 or t < 0 or t > 50 or a < 0 or a > 100 or g < 0 or g > GRACE_MAX:
+        if u1 < 0 or u1 > 25 or u2 < 0 or u2 > 25 or t < 0 or t > 50 or a < 0 or a > 100 or g < 0 or g > CONFIG.GRACE_MAX:
             missing.append({"roll_no": item['roll_no'], "division": item['division'], "reason": "marks out of allowed ranges"})
             continue
 
@@ -932,7 +970,6 @@ def upload_apply_excel(user_id=None, user_type=None):
 
     # Apply upserts in transaction
     saved = []
-    divisions_to_regen = set()
     try:
         for e in to_apply:
             existing = Mark.query.filter_by(roll_no=str(e['roll_no']), division=e['division'], subject_id=int(e['subject_id'])).first()
@@ -960,7 +997,6 @@ def upload_apply_excel(user_id=None, user_type=None):
                 m.grace = e['grace']
                 m.entered_by = user_id
                 db.session.add(m)
-            divisions_to_regen.add(e['division'])
             saved.append({"roll_no": str(e['roll_no']), "division": e['division'], "subject_id": int(e['subject_id'])})
 
         db.session.commit()
@@ -968,12 +1004,6 @@ def upload_apply_excel(user_id=None, user_type=None):
         db.session.rollback()
         return {"error": "Database commit failed", "details": str(ex)}, 500
 
-    for d in divisions_to_regen:
-        try:
-            generate_results_for_division(d)
-        except Exception:
-            pass
-
     return {"message": "Marks applied successfully", "saved": saved, "missing": missing}, 200
 
 
@@ -989,8 +1019,7 @@ def students_by_division(user_id=None, user_type=None):
         return {"error": "division is required"}, 400
 
     # ensure teacher has allocation for this division
-    alloc = TeacherSubjectAllocation.query.filter_by(teacher_id=user_id, division=division).first()
-    if not alloc and user_type != "ADMIN":
+    if user_type != "ADMIN" and not teacher_has_division(user_id, division):
         return {"error": "Not authorized for this division"}, 403
 
     students = Student.query.filter_by(division=division).order_by(Student.roll_no).all()
@@ -1010,8 +1039,7 @@ def student_marks(user_id=None, user_type=None):
         return {"error": "roll_no and division are required"}, 400
 
     # ensure teacher has allocation for this division
-    alloc = TeacherSubjectAllocation.query.filter_by(teacher_id=user_id, division=division).first()
-    if not alloc and user_type != "ADMIN":
+    if user_type != "ADMIN" and not teacher_has_division(user_id, division):
         return {"error": "Not authorized for this division"}, 403
 
     student = Student.query.filter_by(roll_no=roll_no, division=division).first()
@@ -1019,7 +1047,7 @@ def student_marks(user_id=None, user_type=None):
         return {"error": "Student not found"}, 404
 
     # all active subjects
-    all_subjects = Subject.query.filter_by(active=True).order_by(Subject.subject_code).all()
+    all_subjects = active_subjects()
 
     # determine which optional subjects the student takes
     include_codes = set()
@@ -9,6 +9,13 @@ class PaginationSchema(Schema):
     limit = fields.Int(load_default=10, validate=validate.Range(min=1, max=100))
     search = fields.Str(allow_none=True)
 
+# ------------------------------
+# Cursor (keyset) Pagination Schema
+# ------------------------------
+class CursorPaginationSchema(Schema):
+    limit = fields.Int(load_default=None, validate=validate.Range(min=1, max=500))
+    after = fields.Str(load_default=None)
+
 # ------------------------------
 # Login
 # ------------------------------
@@ -0,0 +1,36 @@
+#!/usr/bin/env python
+"""
+Create any indexes declared in models.py that are missing from an existing database.
+`db.create_all()` only adds indexes when it creates a table, so databases created
+before an index was added to the models need this once.
+Usage:
+  python scripts/apply_indexes.py
+"""
+import sys
+from pathlib import Path
+# ensure backend directory is importable when script run from workspace root
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app import create_app, db
+import models  # noqa: F401  (registers tables on db.metadata)
+
+app = create_app()
+
+with app.app_context():
+    inspector = db.inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            print(f"Skipping {table.name}: table does not exist (run init_db.py)")
+            continue
+        existing = {ix["name"] for ix in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name in existing:
+                continue
+            print(f"Creating index {index.name} on {table.name} ...")
+            index.create(bind=db.engine)
+
+print("Indexes up to date.")
@@ -0,0 +1,26 @@
+# /backend/services/allocation_service.py
+
+from flask import g
+from sqlalchemy import exists
+
+from models import TeacherSubjectAllocation
+from app import db
+
+
+def teacher_has_division(teacher_id: int, division: str) -> bool:
+    """
+    True if the teacher is allocated any subject in the division.
+    Remembered for the current request only: an authorization decision must
+    not outlive a deleted allocation or teacher.
+    """
+    if not hasattr(g, "division_access"):
+        g.division_access = {}
+    key = (teacher_id, division)
+    if key not in g.division_access:
+        g.division_access[key] = db.session.query(
+            exists().where(
+                TeacherSubjectAllocation.teacher_id == teacher_id,
+                TeacherSubjectAllocation.division == division,
+            )
+        ).scalar()
+    return g.division_access[key]
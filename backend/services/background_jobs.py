@@ -0,0 +1,100 @@
+# /backend/services/background_jobs.py
+
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from flask import current_app
+from sqlalchemy import delete, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+
+from models import BackgroundJob, now
+from app import db
+
+# Small in-process pool so long computations don't hold a request thread.
+# Job state lives in the background_jobs table, so a status poll can land on
+# any worker process and the idempotency key holds across processes.
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="bg-job")
+
+# Finished jobs stay queryable this long, then are deleted.
+_FINISHED_TTL = timedelta(minutes=10)
+# A job still queued or running after this long belonged to a worker process
+# that died; its key is released so the work can be queued again.
+_STALE_AFTER = timedelta(minutes=10)
+
+
+def _set_status(job_id, **values):
+    db.session.execute(update(BackgroundJob).where(BackgroundJob.job_id == job_id).values(**values))
+    db.session.commit()
+
+
+def enqueue(key: str, fn, *args) -> str:
+    """
+    Run fn(*args) in the background inside an app context and return its
+    job_id, an opaque token safe to use as a URL path segment.
+
+    key is an idempotency key: while a job with the same key is still
+    queued or running, in any process, its job_id is returned instead of
+    starting a second one.
+    """
+    app = current_app._get_current_object()
+
+    t = now()
+    db.session.execute(delete(BackgroundJob).where(BackgroundJob.finished_at < t - _FINISHED_TTL))
+    db.session.execute(
+        update(BackgroundJob)
+        .where(BackgroundJob.active_key == key, BackgroundJob.created_at < t - _STALE_AFTER)
+        .values(active_key=None, status="failed", error="abandoned", finished_at=t)
+    )
+    db.session.commit()
+
+    job_id = uuid.uuid4().hex
+    while True:
+        active = db.session.execute(
+            select(BackgroundJob.job_id).where(BackgroundJob.active_key == key)
+        ).scalar()
+        if active is not None:
+            return active
+        try:
+            db.session.execute(
+                insert(BackgroundJob).values(
+                    job_id=job_id, job_key=key, active_key=key, status="queued", created_at=t
+                )
+            )
+            db.session.commit()
+            break
+        except IntegrityError:
+            # another request queued the same key since the check above
+            db.session.rollback()
+
+    def run():
+        with app.app_context():
+            _set_status(job_id, status="running")
+            try:
+                fn(*args)
+            except Exception as exc:
+                app.logger.exception("background job %s (%s) failed", job_id, key)
+                db.session.rollback()
+                _set_status(job_id, status="failed", error=str(exc), active_key=None, finished_at=now())
+            else:
+                _set_status(job_id, status="finished", active_key=None, finished_at=now())
+
+    _executor.submit(run)
+    return job_id
+
+
+def job_status(job_id: str):
+    """Return a status dict for job_id, or None if it is unknown or expired."""
+    row = db.session.execute(
+        select(BackgroundJob.status, BackgroundJob.error).where(
+            BackgroundJob.job_id == job_id,
+            or_(BackgroundJob.finished_at.is_(None), BackgroundJob.finished_at >= now() - _FINISHED_TTL),
+        )
+    ).first()
+    if row is None:
+        return None
+
+    status = {"job_id": job_id, "status": row.status}
+    if row.status == "failed":
+        status["error"] = row.error
+    return status
@@ -0,0 +1,54 @@
+# /backend/services/pdf_service.py
+
+import importlib.util
+from io import BytesIO
+
+# reportlab is optional; routes check HAVE_REPORTLAB and answer 501 without it.
+# It is only imported when a marksheet is drawn, so app startup doesn't load it.
+HAVE_REPORTLAB = importlib.util.find_spec("reportlab") is not None
+
+
+def render_marksheet(name, roll_no, division, lines, percentage) -> bytes:
+    """
+    Draw a one-page marksheet and return the PDF bytes.
+    lines: (subject code, avg, grace) per subject with a stored average.
+    """
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen.canvas import Canvas
+
+    buf = BytesIO()
+    c = Canvas(buf, pagesize=letter)
+    width, height = letter
+
+    # Header
+    c.setFont('Helvetica-Bold', 16)
+    c.drawString(40, height - 50, 'Official Marksheet')
+    c.setFont('Helvetica', 12)
+    c.drawString(40, height - 70, f'Name: {name}  |  Roll: {roll_no}  |  Division: {division}')
+
+    # Table header
+    y = height - 110
+    c.setFont('Helvetica-Bold', 11)
+    c.drawString(40, y, 'Subject')
+    c.drawString(260, y, 'Annual')
+    c.drawString(360, y, 'Grace')
+    c.drawString(460, y, 'Final')
+    c.setFont('Helvetica', 11)
+    y -= 18
+
+    for code, avg, grace in lines:
+        c.drawString(40, y, code)
+        c.drawRightString(320, y, f'{round(avg,2)}')
+        c.drawRightString(420, y, f'{round(grace,2)}')
+        c.drawRightString(520, y, f'{round(avg + grace,2)}')
+        y -= 16
+
+    y -= 8
+    c.setFont('Helvetica-Bold', 12)
+    c.drawString(40, y, f'Total: {round(percentage,2) if percentage is not None else "-"}')
+    c.drawRightString(520, y, f'Percentage: {percentage or "-"}')
+
+    c.showPage()
+    c.save()
+    return buf.getvalue()
+
@@ -1,8 +1,147 @@
 # /backend/services/result_service.py
 
+import bisect
+import threading
+from contextlib import contextmanager
+
+from flask import current_app
+from sqlalchemy import func, insert, select, text, true, update
+
 from models import Student, Mark, Result, Subject, TeacherSubjectAllocation
 from app import db
 
+# Grade bands for the grade-only subjects (EVS, PE): >=75 A+, >=60 A, >=50 B, >=35 C
+_GRADE_THRESH = [35, 50, 60, 75]
+_GRADE_LABELS = ['F', 'C', 'B', 'A', 'A+']
+
+
+def grade_for(a):
+    """Grade for an annual mark, or None when the mark is missing."""
+    return _GRADE_LABELS[bisect.bisect_right(_GRADE_THRESH, a)] if a is not None else None
+
+
+# Subjects that never count as division-wide required subjects: the
+# grade-only ones and the two optional choice groups
+_GRADE_ONLY_CODES = frozenset({"EVS", "PE"})
+_OPTIONAL_CODES = frozenset({"HINDI", "IT", "MATHS", "SP"})
+
+# optional subject code -> (avg column, grace column), one map per choice group
+_OPTIONAL_1_COLUMNS = {"HINDI": ("hindi_avg", "hindi_grace"), "IT": ("it_avg", "it_grace")}
+_OPTIONAL_2_COLUMNS = {"MATHS": ("maths_avg", "maths_grace"), "SP": ("sp_avg", "sp_grace")}
+
+# Result columns written by generate_results_for_division
+_COMPUTED_COLUMNS = (
+    "eng_avg", "hindi_avg", "it_avg", "maths_avg", "sp_avg", "bk_avg", "oc_avg",
+    "eng_grace", "hindi_grace", "it_grace", "maths_grace", "sp_grace", "bk_grace", "oc_grace",
+    "total_grace", "percentage", "evs_grade", "pe_grade",
+)
+
+
+# division -> fingerprint of the inputs its stored results were generated from
+_generated_from = {}
+
+
+def _inputs_fingerprint(division: str):
+    """
+    Summary of everything result generation reads for a division, taken in
+    one statement. Besides row counts and latest update times it carries
+    checksums of the values themselves: plain sums, sums weighted by the row
+    id (so moving a value between rows shows) and non-NULL counts. Timestamps
+    alone would miss a second edit within the same second (MySQL DATETIME
+    has no fractions) or an edit by another worker process.
+
+    Subjects are not covered although generation reads their codes: the
+    API has no subject write endpoints (see services/subject_service.py).
+    Add them here if that changes.
+    """
+    marks = select(
+        func.count(Mark.mark_id),
+        func.max(Mark.updated_at),
+        func.count(Mark.annual),
+        func.count(Mark.grace),
+        func.sum(Mark.annual),
+        func.sum(Mark.grace),
+        func.sum(Mark.annual * Mark.mark_id),
+        func.sum(Mark.grace * Mark.mark_id),
+        func.sum(Mark.subject_id * Mark.mark_id),
+    ).where(Mark.division == division).subquery()
+    # Optional subject codes differ in length within each choice group
+    # (HINDI/IT, MATHS/SP), so a length-weighted sum tracks the choices.
+    students = select(
+        func.count(Student.student_id),
+        func.max(Student.updated_at),
+        func.sum(func.length(Student.optional_subject) * Student.student_id),
+        func.sum(func.length(Student.optional_subject_2) * Student.student_id),
+    ).where(Student.division == division).subquery()
+    allocations = select(
+        func.count(TeacherSubjectAllocation.allocation_id),
+        func.sum(TeacherSubjectAllocation.allocation_id),
+        func.sum(TeacherSubjectAllocation.subject_id),
+    ).where(TeacherSubjectAllocation.division == division).subquery()
+
+    row = db.session.execute(
+        select(marks, students, allocations)
+        .select_from(marks.join(students, true()).join(allocations, true()))
+    ).one()
+    return tuple(row)
+
+
+def ensure_results_for_division(division: str) -> bool:
+    """
+    Regenerate results for a division only when its inputs, whichever process
+    wrote them, differ from those of the last generation in this process.
+    Mark writes need no notification. Returns True if results were regenerated.
+    """
+    fingerprint = _inputs_fingerprint(division)
+    if _generated_from.get(division) == fingerprint:
+        return False
+    generate_results_for_division(division)
+    _generated_from[division] = fingerprint
+    return True
+
+
+def try_ensure_results_for_division(division: str):
+    """
+    ensure_results_for_division() for read endpoints, which still serve the
+    stored results when regeneration fails. The error is logged and the
+    session rolled back so the request can keep querying.
+    """
+    try:
+        ensure_results_for_division(division)
+    except Exception:
+        db.session.rollback()
+        current_app.logger.exception("Regenerating results for division %s failed", division)
+
+
+# division -> lock serializing its result generation within this process
+_division_locks = {}
+_division_locks_guard = threading.Lock()
+
+
+@contextmanager
+def _generation_lock(division: str):
+    """
+    Hold while a division's results are generated. Two overlapping runs
+    would both insert the missing Result rows and one would fail on
+    uq_result_roll_division. A thread lock covers this process; on MySQL a
+    named lock (GET_LOCK), held on its own connection, covers the other
+    worker processes.
+    """
+    with _division_locks_guard:
+        lock = _division_locks.setdefault(division, threading.Lock())
+    with lock:
+        if db.engine.dialect.name != "mysql":
+            yield
+            return
+        name = f"results:{division}"
+        with db.engine.connect() as conn:
+            if conn.execute(text("SELECT GET_LOCK(:name, 60)"), {"name": name}).scalar() != 1:
+                raise TimeoutError(f"result generation for division {division} is busy")
+            try:
+                yield
+            finally:
+                conn.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": name})
+
 
 def generate_results_for_division(division: str):
     """
@@ -10,52 +149,79 @@ def generate_results_for_division(division: str):
 
     Only create/update a Result row for a student when marks for all
     required subjects (core + their chosen optional subjects) are present.
+    Runs for one division at a time, across worker processes on MySQL.
     """
+    with _generation_lock(division):
+        # End the transaction begun before the lock was taken: its snapshot
+        # may predate the rows the previous holder committed.
+        db.session.commit()
+        _write_results(division)
+
 
+def _write_results(division: str):
+    """Body of generate_results_for_division; run under _generation_lock."""
     # Fetch subjects mapping
     subjects = {s.subject_id: s.subject_code for s in Subject.query.all()}
 
     students = Student.query.filter_by(division=division).all()
 
-    for student in students:
-        marks = Mark.query.filter_by(
-            roll_no=student.roll_no,
-            division=student.division,
-        ).all()
+    # Determine the subjects every student of the division must have.
+    # Prefer deriving required subjects from teacher allocations for the division;
+    # they are the same for every student, so look them up once.
+    allocs = TeacherSubjectAllocation.query.filter_by(division=division).all()
+    base_required = []
+    if allocs:
+        for a in allocs:
+            code = subjects.get(a.subject_id)
+            if not code:
+                continue
+            # exclude grading-only and optional-coded subjects here
+            if code in _GRADE_ONLY_CODES or code in _OPTIONAL_CODES:
+                continue
+            if code not in base_required:
+                base_required.append(code)
+    else:
+        # fallback to sensible defaults if no allocations found
+        base_required = ["ENG", "ECO", "BK", "OC"]
 
+    # One query for the division's marks, reading only the columns results
+    # use, bucketed as roll_no -> subject_code -> (annual, grace) row
+    marks_by_roll = {}
+    mark_rows = db.session.query(Mark.roll_no, Mark.subject_id, Mark.annual, Mark.grace).filter(
+        Mark.division == division
+    )
+    for m in mark_rows:
+        code = subjects.get(m.subject_id)
+        if code:
+            marks_by_roll.setdefault(m.roll_no, {})[code] = m
+
+    # Existing results of the division, keyed by roll_no. Changed rows are
+    # written back with two executemany statements rather than per-object flushes.
+    existing_results = {
+        r.roll_no: r
+        for r in db.session.query(
+            Result.result_id, Result.roll_no, *(getattr(Result, c) for c in _COMPUTED_COLUMNS)
+        ).filter(Result.division == division)
+    }
+    updates = []
+    inserts = []
+    required_by_opts = {}
+
+    for student in students:
         # Map subject_code → mark
-        mark_map = {}
-        for m in marks:
-            code = subjects.get(m.subject_id)
-            if code:
-                mark_map[code] = m
-
-        # Determine required subject codes for this student.
-        # Prefer deriving required subjects from teacher allocations for the student's division.
-        grading_only = {"EVS", "PE"}
-        optional_codes = {"HINDI", "IT", "MATHS", "SP"}
-
-        allocs = TeacherSubjectAllocation.query.filter_by(division=student.division).all()
-        base_required = []
-        if allocs:
-            for a in allocs:
-                code = subjects.get(a.subject_id)
-                if not code:
-                    continue
-                # exclude grading-only and optional-coded subjects here
-                if code in grading_only or code in optional_codes:
-                    continue
-                if code not in base_required:
-                    base_required.append(code)
-        else:
-            # fallback to sensible defaults if no allocations found
-            base_required = ["ENG", "ECO", "BK", "OC"]
+        mark_map = marks_by_roll.get(student.roll_no, {})
 
-        required_codes = list(base_required)
-        if student.optional_subject in ("HINDI", "IT"):
-            required_codes.append(student.optional_subject)
-        if student.optional_subject_2 in ("MATHS", "SP"):
-            required_codes.append(student.optional_subject_2)
+        # Required subject codes for this student: the division's base
+        # subjects plus the optional subjects the student chose.
+        # Only a handful of (optional, optional_2) pairs occur, so build each
+        # tuple once per division.
+        opts = (student.optional_subject, student.optional_subject_2)
+        required_codes = required_by_opts.get(opts)
+        if required_codes is None:
+            required_codes = required_by_opts[opts] = tuple(base_required) + tuple(
+                code for code, group in zip(opts, (_OPTIONAL_1_COLUMNS, _OPTIONAL_2_COLUMNS))
+                if code in group
+            )
 
         # If any required subject is missing Annual marks, do not compute percentage
         missing_required = False
@@ -66,129 +232,118 @@ def generate_results_for_division(division: str):
                 break
         if missing_required:
             # If a Result already exists, clear its percentage to avoid showing stale/incorrect values
-            existing = Result.query.filter_by(roll_no=student.roll_no, division=student.division).first()
-            if existing:
-                existing.percentage = None
-                db.session.add(existing)
+            existing = existing_results.get(student.roll_no)
+            if existing and existing.percentage is not None:
+                updates.append({"result_id": existing.result_id, "percentage": None})
             # Skip calculation for this student until all required Annual marks are present
             continue
 
         # All required marks are present — proceed to create/update result
-        result = Result.query.filter_by(
-            roll_no=student.roll_no,
-            division=student.division,
-        ).first()
-
-        if not result:
-            # SQLAlchemy model `Result` does not define a custom __init__ that
-            # accepts kwargs for columns; assign attributes explicitly to
-            # satisfy static checkers and avoid unexpected __init__ behavior.
-            result = Result()
-            result.roll_no = student.roll_no
-            result.name = student.name
-            result.division = student.division
+        existing = existing_results.get(student.roll_no)
+        if existing:
+            # Start from the stored values so unchanged rows can be skipped
+            stored = existing._asdict()
+            result = dict(stored)
+        else:
+            stored = None
+            result = {
+                "roll_no": student.roll_no,
+                "name": student.name,
+                "division": student.division,
+            }
 
         # total sums Annual marks only (used for percentage calculation)
         total = 0.0
+        total_grace = 0.0
         count = 0
 
         # ---------------- CORE SUBJECTS ----------------
-        for code, field in {
-            "ENG": "eng",
-            "ECO": "eco",
-            "BK": "bk",
-            "OC": "oc",
-        }.items():
-            m = mark_map.get(code)
-            if m:
-                annual = m.annual if m.annual is not None else 0.0
-                grace = m.grace or 0.0
-                # Store Annual in the result avg fields (avg kept only for compatibility/display)
-                setattr(result, f"{field}_avg", annual)
-                setattr(result, f"{field}_grace", grace)
-                total += annual
-                count += 1
+        # Store Annual in the result avg fields (avg kept only for compatibility/display)
+        m = mark_map.get("ENG")
+        if m:
+            annual = m.annual if m.annual is not None else 0.0
+            result["eng_avg"] = annual
+            grace = m.grace or 0.0
+            result["eng_grace"] = grace
+            total += annual
+            total_grace += grace
+            count += 1
 
-        # ---------------- OPTIONAL GROUP 1 ----------------
-        if student.optional_subject == "HINDI":
-            m = mark_map.get("HINDI")
-            annual = m.annual if m and m.annual is not None else 0.0
-            result.hindi_avg = annual
-            result.hindi_grace = (m.grace if m and m.grace is not None else 0.0)
-            total += result.hindi_avg
+        # Result has no ECO columns; ECO only counts towards the percentage
+        m = mark_map.get("ECO")
+        if m:
+            total += m.annual if m.annual is not None else 0.0
             count += 1
-        elif student.optional_subject == "IT":
-            m = mark_map.get("IT")
-            annual = m.annual if m and m.annual is not None else 0.0
-            result.it_avg = annual
-            result.it_grace = (m.grace if m and m.grace is not None else 0.0)
-            total += result.it_avg
+
+        m = mark_map.get("BK")
+        if m:
+            annual = m.annual if m.annual is not None else 0.0
+            result["bk_avg"] = annual
+            grace = m.grace or 0.0
+            result["bk_grace"] = grace
+            total += annual
+            total_grace += grace
             count += 1
 
-        # ---------------- OPTIONAL GROUP 2 ----------------
-        if student.optional_subject_2 == "MATHS":
-            m = mark_map.get("MATHS")
+        m = mark_map.get("OC")
+        if m:
+            annual = m.annual if m.annual is not None else 0.0
+            result["oc_avg"] = annual
+            grace = m.grace or 0.0
+            result["oc_grace"] = grace
+            total += annual
+            total_grace += grace
+            count += 1
+
+        # ---------------- OPTIONAL GROUP 1 ----------------
+        columns = _OPTIONAL_1_COLUMNS.get(student.optional_subject)
+        if columns:
+            m = mark_map.get(student.optional_subject)
             annual = m.annual if m and m.annual is not None else 0.0
-            result.maths_avg = annual
-            result.maths_grace = (m.grace if m and m.grace is not None else 0.0)
-            total += result.maths_avg
+            result[columns[0]] = annual
+            grace = m.grace if m and m.grace is not None else 0.0
+            result[columns[1]] = grace
+            total += annual
+            total_grace += grace
             count += 1
-        elif student.optional_subject_2 == "SP":
-            m = mark_map.get("SP")
+
+        # ---------------- OPTIONAL GROUP 2 ----------------
+        columns = _OPTIONAL_2_COLUMNS.get(student.optional_subject_2)
+        if columns:
+            m = mark_map.get(student.optional_subject_2)
             annual = m.annual if m and m.annual is not None else 0.0
-            result.sp_avg = annual
-            result.sp_grace = (m.grace if m and m.grace is not None else 0.0)
-            total += result.sp_avg
+            result[columns[0]] = annual
+            grace = m.grace if m and m.grace is not None else 0.0
+            result[columns[1]] = grace
+            total += annual
+            total_grace += grace
             count += 1
 
         # ---------------- FINAL CALC ----------------
-        result.total_grace = sum(
-            g for g in [
-                result.eng_grace,
-                result.hindi_grace,
-                result.it_grace,
-                result.maths_grace,
-                result.sp_grace,
-                result.bk_grace,
-                result.oc_grace,
-            ]
-            if g is not None
-        )
+        result["total_grace"] = total_grace
 
         # Percentage is calculated only from Annual marks (avg fields now store Annual)
         # Exclude grade-only subjects (EVS, PE) from the calculation
         if count > 0:
-            result.percentage = round((total / count), 2)
+            result["percentage"] = round((total / count), 2)
 
         # EVS and PE are grade-only. If annual marks exist for them, convert to grade and store.
         evs_mark = mark_map.get('EVS')
         if evs_mark and evs_mark.annual is not None:
-            a = evs_mark.annual
-            if a >= 75:
-                result.evs_grade = 'A+'
-            elif a >= 60:
-                result.evs_grade = 'A'
-            elif a >= 50:
-                result.evs_grade = 'B'
-            elif a >= 35:
-                result.evs_grade = 'C'
-            else:
-                result.evs_grade = 'F'
+            result["evs_grade"] = grade_for(evs_mark.annual)
 
         pe_mark = mark_map.get('PE')
         if pe_mark and pe_mark.annual is not None:
-            a = pe_mark.annual
-            if a >= 75:
-                result.pe_grade = 'A+'
-            elif a >= 60:
-                result.pe_grade = 'A'
-            elif a >= 50:
-                result.pe_grade = 'B'
-            elif a >= 35:
-                result.pe_grade = 'C'
-            else:
-                result.pe_grade = 'F'
-
-        db.session.add(result)
+            result["pe_grade"] = grade_for(pe_mark.annual)
+
+        if stored is None:
+            inserts.append(result)
+        elif result != stored:
+            del result["roll_no"]
+            updates.append(result)
 
+    if updates:
+        db.session.execute(update(Result), updates)
+    if inserts:
+        db.session.execute(insert(Result), inserts)
     db.session.commit()
@@ -0,0 +1,30 @@
+# /backend/services/subject_service.py
+
+from collections import namedtuple
+
+from cachetools import TTLCache, cached
+
+from models import Subject
+from app import db
+
+# Plain rows rather than ORM instances: cached objects outlive the session
+# that loaded them and would be detached/expired on the next request.
+ActiveSubject = namedtuple("ActiveSubject", "subject_id subject_code subject_name subject_type")
+
+# The API has no subject write endpoints: subjects change only through the
+# setup scripts (init_db.py, scripts/populate_sample_data.py), which run in
+# their own processes and can't clear this cache. A running server picks
+# their changes up once the 5 minute TTL expires.
+_active_cache = TTLCache(maxsize=1, ttl=300)
+
+
+@cached(_active_cache)
+def active_subjects():
+    """Active subjects ordered by subject_code, cached for 5 minutes."""
+    rows = (
+        db.session.query(Subject.subject_id, Subject.subject_code, Subject.subject_name, Subject.subject_type)
+        .filter_by(active=True)
+        .order_by(Subject.subject_code)
+        .all()
+    )
+    return tuple(ActiveSubject(*r) for r in rows)
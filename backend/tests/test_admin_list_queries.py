@@ -0,0 +1,93 @@
+# backend/tests/test_admin_list_queries.py
+"""Query-count regression tests for admin list endpoints"""
+import unittest
+from dataclasses import replace
+from sqlalchemy import event
+
+from config import CONFIG
+from app import create_app, db
+from models import Admin, Teacher, Subject, Student, TeacherSubjectAllocation
+from auth import hash_password, generate_token
+
+
+class AdminListQueriesTestCase(unittest.TestCase):
+    """Admin list endpoints must not fall back into N+1 queries"""
+
+    def setUp(self):
+        """Create an in-memory app with a few allocations and students"""
+        # in-memory SQLite takes no pool sizing options
+        self.app = create_app(replace(
+            CONFIG, SQLALCHEMY_DATABASE_URI="sqlite://", SQLALCHEMY_ENGINE_OPTIONS={}
+        ))
+        self.app.config["TESTING"] = True
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            db.create_all()
+
+            admin = Admin(username="testadmin", password_hash=hash_password("testpass123"), active=True)
+            db.session.add(admin)
+
+            teachers = [Teacher(name=f"Teacher {i}", userid=f"t{i}", password_hash="x") for i in range(3)]
+            subjects = [
+                Subject(subject_code=code, subject_name=code.title(), subject_type="CORE")
+                for code in ("ENG", "ECO", "BK")
+            ]
+            db.session.add_all(teachers + subjects)
+            db.session.flush()
+
+            for t, s in zip(teachers, subjects):
+                alloc = TeacherSubjectAllocation()
+                alloc.teacher_id = t.teacher_id
+                alloc.subject_id = s.subject_id
+                alloc.division = "A"
+                db.session.add(alloc)
+
+            for i in range(5):
+                db.session.add(Student(roll_no=f"{i:03d}", division="A", name=f"Student {i}"))
+
+            db.session.commit()
+            self.token = generate_token(admin.admin_id, "ADMIN")
+
+    def tearDown(self):
+        """Clean up after tests"""
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def _count_queries(self, url):
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        with self.app.app_context():
+            engine = db.engine
+            event.listen(engine, "before_cursor_execute", before_cursor_execute)
+            try:
+                response = self.client.get(url, headers={"Authorization": f"Bearer {self.token}"})
+            finally:
+                event.remove(engine, "before_cursor_execute", before_cursor_execute)
+        return response, len(statements)
+
+    def test_list_allocations_query_count(self):
+        """Allocations list costs the token lookup plus one query"""
+        response, query_count = self._count_queries("/admin/allocations")
+
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual(len(data), 3)
+        self.assertTrue(all(a["teacher_name"] and a["subject_code"] for a in data))
+        self.assertLessEqual(query_count, 2)
+
+    def test_list_students_query_count(self):
+        """Students list costs the token lookup plus one query"""
+        response, query_count = self._count_queries("/admin/students?division=A")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.get_json()), 5)
+        self.assertLessEqual(query_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
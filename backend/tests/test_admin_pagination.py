@@ -0,0 +1,162 @@
+# backend/tests/test_admin_pagination.py
+"""Response shapes and keyset paging of the admin list endpoints"""
+import json
+import unittest
+from dataclasses import replace
+from sqlalchemy import event, insert
+from sqlalchemy.exc import OperationalError
+
+from config import CONFIG
+from app import create_app, db
+from models import Admin, Teacher, Subject, Student, TeacherSubjectAllocation
+from auth import hash_password, generate_token
+
+
+class AdminPaginationTestCase(unittest.TestCase):
+    """Unpaged requests get a bare array, paged ones an items/next_cursor envelope"""
+
+    def setUp(self):
+        """Create an in-memory app with three allocations and five students"""
+        self.app = create_app(replace(
+            CONFIG, SQLALCHEMY_DATABASE_URI="sqlite://", SQLALCHEMY_ENGINE_OPTIONS={}
+        ))
+        self.app.config["TESTING"] = True
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            db.create_all()
+
+            admin = Admin(username="testadmin", password_hash=hash_password("testpass123"), active=True)
+            db.session.add(admin)
+
+            teachers = [Teacher(name=f"Teacher {i}", userid=f"t{i}", password_hash="x") for i in range(3)]
+            subjects = [
+                Subject(subject_code=code, subject_name=code.title(), subject_type="CORE")
+                for code in ("ENG", "ECO", "BK")
+            ]
+            db.session.add_all(teachers + subjects)
+            db.session.flush()
+
+            for t, s in zip(teachers, subjects):
+                alloc = TeacherSubjectAllocation()
+                alloc.teacher_id = t.teacher_id
+                alloc.subject_id = s.subject_id
+                alloc.division = "A"
+                db.session.add(alloc)
+
+            # inserted out of order; the endpoint sorts by roll_no
+            for i in (3, 0, 4, 1, 2):
+                db.session.add(Student(roll_no=f"{i:03d}", division="A", name=f"Student {i}"))
+            db.session.add(Student(roll_no="000", division="B", name="Other division"))
+
+            db.session.commit()
+            self.token = generate_token(admin.admin_id, "ADMIN")
+
+    def tearDown(self):
+        """Clean up after tests"""
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def _get(self, url):
+        return self.client.get(url, headers={"Authorization": f"Bearer {self.token}"})
+
+    def _walk(self, url, key):
+        """Follow next_cursor from the first page to the last; return every key and the page count"""
+        seen, pages, after = [], 0, None
+        while True:
+            page_url = url if after is None else f"{url}&after={after}"
+            response = self._get(page_url)
+            self.assertEqual(response.status_code, 200)
+            data = response.get_json()
+            self.assertEqual(set(data), {"items", "next_cursor"})
+            seen += [item[key] for item in data["items"]]
+            pages += 1
+            after = data["next_cursor"]
+            if after is None:
+                return seen, pages
+
+    def test_students_unpaged_is_array(self):
+        """Without limit/after the students list is a bare array"""
+        data = self._get("/admin/students?division=A").get_json()
+
+        self.assertIsInstance(data, list)
+        self.assertEqual([s["roll_no"] for s in data], ["000", "001", "002", "003", "004"])
+
+    def test_students_unpaged_stream_parses(self):
+        """The streamed array is complete, valid JSON across several fetch chunks"""
+        with self.app.app_context():
+            db.session.execute(insert(Student), [
+                {"roll_no": f"{i:04d}", "division": "C", "name": f"Student {i}", "optional_subject": "IT"}
+                for i in range(1200)
+            ])
+            db.session.commit()
+
+        response = self._get("/admin/students?division=C")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, "application/json")
+
+        data = json.loads(response.get_data())
+        self.assertEqual([s["roll_no"] for s in data], [f"{i:04d}" for i in range(1200)])
+        self.assertEqual(data[0], {
+            "roll_no": "0000", "name": "Student 0", "division": "C",
+            "optional_subject": "IT", "optional_subject_2": None,
+        })
+
+        self.assertEqual(json.loads(self._get("/admin/students?division=Z").get_data()), [])
+
+    def test_students_unpaged_query_error(self):
+        """A failing query is reported with an error status, not a 200 stream"""
+        def fail_students(conn, cursor, statement, parameters, context, executemany):
+            if "FROM students" in statement and "ORDER BY students.roll_no" in statement:
+                raise OperationalError(statement, parameters, Exception("connection lost"))
+
+        self.app.config["PROPAGATE_EXCEPTIONS"] = False
+        with self.app.app_context():
+            engine = db.engine
+        event.listen(engine, "before_cursor_execute", fail_students)
+        try:
+            response = self._get("/admin/students?division=A")
+        finally:
+            event.remove(engine, "before_cursor_execute", fail_students)
+
+        self.assertEqual(response.status_code, 500)
+
+    def test_students_paged(self):
+        """Pages of two walk every student once, in roll_no order"""
+        seen, pages = self._walk("/admin/students?division=A&limit=2", "roll_no")
+
+        self.assertEqual(seen, ["000", "001", "002", "003", "004"])
+        self.assertEqual(pages, 3)
+
+    def test_students_after_only(self):
+        """after without limit returns the rest of the division in one envelope"""
+        data = self._get("/admin/students?division=A&after=002").get_json()
+
+        self.assertEqual([s["roll_no"] for s in data["items"]], ["003", "004"])
+        self.assertIsNone(data["next_cursor"])
+
+    def test_allocations_unpaged_is_array(self):
+        """Without limit/after the allocations list is a bare array"""
+        data = self._get("/admin/allocations").get_json()
+
+        self.assertIsInstance(data, list)
+        self.assertEqual(len(data), 3)
+
+    def test_allocations_paged(self):
+        """Pages of two walk every allocation once, in allocation_id order"""
+        seen, pages = self._walk("/admin/allocations?limit=2", "allocation_id")
+
+        self.assertEqual(len(seen), 3)
+        self.assertEqual(seen, sorted(seen))
+        self.assertEqual(pages, 2)
+
+    def test_invalid_parameters(self):
+        """Bad limit or a non-numeric allocation cursor is a 400"""
+        self.assertEqual(self._get("/admin/students?division=A&limit=0").status_code, 400)
+        self.assertEqual(self._get("/admin/students?division=A&limit=x").status_code, 400)
+        self.assertEqual(self._get("/admin/allocations?limit=2&after=abc").status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+# backend/tests/test_admin_students_bulk.py
+"""POST /admin/students/bulk"""
+import unittest
+from dataclasses import replace
+
+from config import CONFIG
+from app import create_app, db
+from models import Admin, Student
+from auth import hash_password, generate_token
+
+
+class AdminStudentsBulkTestCase(unittest.TestCase):
+    """Per-row statuses, response codes and the rows actually stored"""
+
+    def setUp(self):
+        """Create an in-memory app with one existing student"""
+        self.app = create_app(replace(
+            CONFIG, SQLALCHEMY_DATABASE_URI="sqlite://", SQLALCHEMY_ENGINE_OPTIONS={}
+        ))
+        self.app.config["TESTING"] = True
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            db.create_all()
+
+            admin = Admin(username="testadmin", password_hash=hash_password("testpass123"), active=True)
+            db.session.add(admin)
+            db.session.add(Student(roll_no="001", division="A", name="Existing"))
+            db.session.commit()
+            self.token = generate_token(admin.admin_id, "ADMIN")
+
+    def tearDown(self):
+        """Clean up after tests"""
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def _post(self, payload):
+        return self.client.post(
+            "/admin/students/bulk", json=payload, headers={"Authorization": f"Bearer {self.token}"}
+        )
+
+    def _stored(self):
+        with self.app.app_context():
+            return {
+                (s.roll_no, s.division): (s.name, s.optional_subject, s.optional_subject_2)
+                for s in Student.query.all()
+            }
+
+    def test_valid_rows(self):
+        """New rows are created and reported as created"""
+        response = self._post([
+            {"roll_no": "002", "division": "A", "name": "Two", "optional_subject": "IT"},
+            {"roll_no": "001", "division": "B", "name": "Same roll, other division",
+             "optional_subject_2": "MATHS"},
+        ])
+
+        self.assertEqual(response.status_code, 201)
+        data = response.get_json()
+        self.assertEqual(data["created"], 2)
+        self.assertEqual([r["status"] for r in data["results"]], ["created", "created"])
+        self.assertEqual(self._stored(), {
+            ("001", "A"): ("Existing", None, None),
+            ("002", "A"): ("Two", "IT", None),
+            ("001", "B"): ("Same roll, other division", None, "MATHS"),
+        })
+
+    def test_duplicate_in_db(self):
+        """A row that already exists is reported as exists and left untouched"""
+        response = self._post([
+            {"roll_no": "001", "division": "A", "name": "Changed"},
+            {"roll_no": "002", "division": "A", "name": "Two"},
+        ])
+
+        self.assertEqual(response.status_code, 201)
+        data = response.get_json()
+        self.assertEqual(data["created"], 1)
+        self.assertEqual(
+            [(r["roll_no"], r["status"]) for r in data["results"]], [("001", "exists"), ("002", "created")]
+        )
+        self.assertEqual(self._stored()[("001", "A")], ("Existing", None, None))
+
+    def test_duplicate_in_batch(self):
+        """A key repeated in one request is created once; later copies report exists"""
+        response = self._post([
+            {"roll_no": "002", "division": "A", "name": "First"},
+            {"roll_no": "002", "division": "A", "name": "Second"},
+        ])
+
+        self.assertEqual(response.status_code, 201)
+        data = response.get_json()
+        self.assertEqual(data["created"], 1)
+        self.assertEqual([r["status"] for r in data["results"]], ["created", "exists"])
+        self.assertEqual(self._stored()[("002", "A")], ("First", None, None))
+
+    def test_nothing_created(self):
+        """When every row already exists the answer is 200, not 201"""
+        response = self._post([{"roll_no": "001", "division": "A", "name": "Existing"}])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["created"], 0)
+
+    def test_invalid_rows(self):
+        """Any invalid row rejects the whole batch with 400 and stores nothing"""
+        response = self._post([
+            {"roll_no": "002", "division": "A", "name": "Two"},
+            {"roll_no": "003", "division": "A"},
+        ])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("1", response.get_json()["details"])
+        self.assertEqual(len(self._stored()), 1)
+
+        self.assertEqual(self._post([]).status_code, 400)
+        self.assertEqual(self._post({"roll_no": "002"}).status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
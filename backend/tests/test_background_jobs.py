@@ -0,0 +1,126 @@
+# backend/tests/test_background_jobs.py
+"""Background job queue used by POST /admin/results/generate"""
+import os
+import tempfile
+import threading
+import time
+import unittest
+from dataclasses import replace
+from datetime import timedelta
+from unittest import mock
+
+from config import CONFIG
+from app import create_app, db
+from models import Admin, BackgroundJob, now
+from auth import hash_password, generate_token
+from services.background_jobs import enqueue, job_status
+
+
+class BackgroundJobsTestCase(unittest.TestCase):
+    """Job state is shared through the database and finished jobs expire"""
+
+    def setUp(self):
+        """Create an app on a file database so the job thread gets its own connection"""
+        fd, self.db_path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self.app = create_app(replace(
+            CONFIG, SQLALCHEMY_DATABASE_URI=f"sqlite:///{self.db_path}", SQLALCHEMY_ENGINE_OPTIONS={}
+        ))
+        self.app.config["TESTING"] = True
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            db.create_all()
+            admin = Admin(username="testadmin", password_hash=hash_password("testpass123"), active=True)
+            db.session.add(admin)
+            db.session.commit()
+            self.token = generate_token(admin.admin_id, "ADMIN")
+
+    def tearDown(self):
+        """Clean up after tests"""
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+            db.engine.dispose()
+        os.remove(self.db_path)
+
+    def _wait(self, job_id):
+        """Poll until the job has ended and return its status"""
+        for _ in range(200):
+            status = job_status(job_id)
+            if status["status"] in ("finished", "failed"):
+                return status
+            time.sleep(0.01)
+        self.fail(f"job {job_id} did not finish")
+
+    def test_enqueue_and_status(self):
+        """A job runs in the background and reports finished or failed"""
+        with self.app.app_context():
+            job_id = enqueue("ok", lambda: None)
+            self.assertEqual(len(job_id), 32)
+            self.assertEqual(self._wait(job_id), {"job_id": job_id, "status": "finished"})
+
+            job_id = enqueue("bad", lambda: 1 / 0)
+            self.assertEqual(
+                self._wait(job_id), {"job_id": job_id, "status": "failed", "error": "division by zero"}
+            )
+
+            self.assertIsNone(job_status("unknown"))
+
+    def test_same_key_while_active(self):
+        """The same key returns the active job; a new job starts once it has ended"""
+        release = threading.Event()
+        with self.app.app_context():
+            first = enqueue("gen:A", release.wait, 5)
+            self.assertEqual(enqueue("gen:A", release.wait, 5), first)
+            self.assertNotEqual(enqueue("gen:B", lambda: None), first)
+
+            release.set()
+            self._wait(first)
+            self.assertNotEqual(enqueue("gen:A", lambda: None), first)
+
+    def test_finished_jobs_expire(self):
+        """Finished jobs disappear from status after the TTL and are deleted on the next enqueue"""
+        with self.app.app_context():
+            job_id = enqueue("ok", lambda: None)
+            self._wait(job_id)
+
+            later = now() + timedelta(minutes=11)
+            with mock.patch("services.background_jobs.now", return_value=later):
+                self.assertIsNone(job_status(job_id))
+                other = enqueue("other", lambda: None)
+            self._wait(other)
+
+            self.assertIsNone(db.session.get(BackgroundJob, job_id))
+
+    def test_abandoned_job_releases_key(self):
+        """A job left active by a dead worker process does not block its key forever"""
+        with self.app.app_context():
+            db.session.add(BackgroundJob(
+                job_id="0" * 32, job_key="gen:A", active_key="gen:A", status="running",
+                created_at=now() - timedelta(minutes=11),
+            ))
+            db.session.commit()
+
+            job_id = enqueue("gen:A", lambda: None)
+            self.assertNotEqual(job_id, "0" * 32)
+            self.assertEqual(job_status("0" * 32)["status"], "failed")
+            self._wait(job_id)
+
+    def test_generate_route(self):
+        """The route answers 202 with a job id whose status can be polled"""
+        headers = {"Authorization": f"Bearer {self.token}"}
+        response = self.client.post("/admin/results/generate", json={"division": "A/1"}, headers=headers)
+        self.assertEqual(response.status_code, 202)
+        job_id = response.get_json()["job_id"]
+
+        with self.app.app_context():
+            self.assertEqual(self._wait(job_id)["status"], "finished")
+
+        response = self.client.get(f"/admin/results/generate/{job_id}", headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["status"], "finished")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+# backend/tests/test_json_provider.py
+"""orjson-backed JSON provider must answer like Flask's stdlib provider"""
+import json
+import unittest
+from dataclasses import replace
+from datetime import date, datetime
+from decimal import Decimal
+
+from flask import jsonify
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import Numeric, cast, literal, select
+
+from config import CONFIG
+from app import create_app, db
+from json_provider import HAVE_ORJSON, OrjsonProvider
+
+
+@unittest.skipUnless(HAVE_ORJSON, "orjson not installed")
+class OrjsonProviderTestCase(unittest.TestCase):
+    """Values the routes return serialize to the same JSON as with the stdlib provider"""
+
+    def setUp(self):
+        """Create an in-memory app and a stdlib provider configured the same way"""
+        self.app = create_app(replace(
+            CONFIG, SQLALCHEMY_DATABASE_URI="sqlite://", SQLALCHEMY_ENGINE_OPTIONS={}
+        ))
+        self.app.config["TESTING"] = True
+        self.stdlib = DefaultJSONProvider(self.app)
+        self.stdlib.sort_keys = self.app.json.sort_keys
+        self.stdlib.compact = self.app.json.compact
+
+    def _payload(self):
+        """Decimals from a Numeric column, dates, non-str keys and rounded floats"""
+        average = db.session.execute(select(cast(literal("72.50"), Numeric(5, 2)))).scalar()
+        self.assertIsInstance(average, Decimal)
+        return {
+            "average": average,
+            "exam_date": date(2024, 3, 1),
+            "updated_at": datetime(2024, 3, 1, 10, 5, 7),
+            "by_subject_id": {1: 72.5, 2: None},
+            "percentage": round(2 / 3 * 100, 2),
+            "rows": [{"roll_no": "001", "name": "Ré Kumar", "evs_grade": "A+"}],
+            "big": 2 ** 70,
+        }
+
+    def test_provider_in_use(self):
+        """create_app installs the orjson provider"""
+        self.assertIsInstance(self.app.json, OrjsonProvider)
+
+    def test_matches_stdlib(self):
+        """Responses carry the same values as the stdlib provider would send"""
+        with self.app.app_context():
+            payload = self._payload()
+            body = jsonify(payload).get_data()
+            expected = self.stdlib.response(payload).get_data()
+
+        self.assertEqual(json.loads(body), json.loads(expected))
+        data = json.loads(body)
+        self.assertEqual(data["average"], "72.50")
+        self.assertEqual(data["exam_date"], "Fri, 01 Mar 2024 00:00:00 GMT")
+        self.assertEqual(data["updated_at"], "Fri, 01 Mar 2024 10:05:07 GMT")
+        self.assertEqual(data["by_subject_id"], {"1": 72.5, "2": None})
+        self.assertEqual(data["big"], 2 ** 70)
+
+        # compact and in insertion order, like the configured stdlib provider
+        self.assertTrue(body.startswith(b'{"average":"72.50","exam_date":'))
+        self.assertTrue(body.endswith(b"\n"))
+
+    def test_loads_round_trip(self):
+        """Request bodies parse the same way, from str or bytes"""
+        text = '{"roll_no":"001","annual":72.5,"grace":null,"marks":[1,2]}'
+        with self.app.app_context():
+            self.assertEqual(self.app.json.loads(text), json.loads(text))
+            self.assertEqual(self.app.json.loads(text.encode()), json.loads(text))
+
+    def test_unsupported_type(self):
+        """Unserializable values still raise TypeError"""
+        with self.app.app_context():
+            with self.assertRaises(TypeError):
+                self.app.json.dumps({"x": object()})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+# backend/tests/test_marksheet_pdf.py
+"""PDF marksheet endpoint"""
+import unittest
+from dataclasses import replace
+from unittest import mock
+
+from config import CONFIG
+from app import create_app, db
+from models import Admin, Subject, Student, Mark
+from auth import hash_password, generate_token
+from services import result_service
+from services.pdf_service import HAVE_REPORTLAB
+
+
+class MarksheetPdfTestCase(unittest.TestCase):
+    """The marksheet is drawn inline and answers 501 without reportlab"""
+
+    def setUp(self):
+        """Create an in-memory app with one student marked in every default subject"""
+        self.app = create_app(replace(
+            CONFIG, SQLALCHEMY_DATABASE_URI="sqlite://", SQLALCHEMY_ENGINE_OPTIONS={}
+        ))
+        self.app.config["TESTING"] = True
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            db.create_all()
+
+            admin = Admin(username="testadmin", password_hash=hash_password("testpass123"), active=True)
+            subjects = [
+                Subject(subject_code=code, subject_name=code.title(), subject_type="CORE")
+                for code in ("ENG", "ECO", "BK", "OC")
+            ]
+            db.session.add_all([admin] + subjects)
+            db.session.add(Student(roll_no="001", division="A", name="Student 1"))
+            db.session.flush()
+
+            for s in subjects:
+                db.session.add(Mark(roll_no="001", division="A", subject_id=s.subject_id, annual=70, grace=0))
+
+            db.session.commit()
+            self.token = generate_token(admin.admin_id, "ADMIN")
+
+    def tearDown(self):
+        """Clean up after tests"""
+        result_service._generated_from.clear()
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def _get(self, url):
+        return self.client.get(url, headers={"Authorization": f"Bearer {self.token}"})
+
+    @unittest.skipUnless(HAVE_REPORTLAB, "reportlab not installed")
+    def test_pdf_rendered(self):
+        """The PDF is returned as an attachment"""
+        response = self._get("/admin/students/001/pdf?division=A")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, "application/pdf")
+        self.assertIn("001_marksheet.pdf", response.headers["Content-Disposition"])
+        self.assertTrue(response.data.startswith(b"%PDF"))
+
+    def test_without_reportlab(self):
+        """Without reportlab the endpoint answers 501 instead of failing"""
+        with mock.patch("routes.admin_routes.HAVE_REPORTLAB", False):
+            response = self._get("/admin/students/001/pdf?division=A")
+
+        self.assertEqual(response.status_code, 501)
+        self.assertIn("reportlab", response.get_json()["error"])
+
+    def test_unknown_student(self):
+        """A roll number without a result is a 404"""
+        response = self._get("/admin/students/999/pdf?division=A")
+
+        self.assertEqual(response.status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+# backend/tests/test_result_freshness.py
+"""Stored results must follow mark changes made outside this process"""
+import unittest
+from dataclasses import replace
+from unittest import mock
+from sqlalchemy import update
+
+from config import CONFIG
+from app import create_app, db
+from models import Subject, Student, Mark, Result, TeacherSubjectAllocation
+from services import result_service
+from services.result_service import ensure_results_for_division, try_ensure_results_for_division
+
+
+class ResultFreshnessTestCase(unittest.TestCase):
+    """ensure_results_for_division must notice mark changes from its inputs alone"""
+
+    def setUp(self):
+        """Create an in-memory app with one student marked in every core subject"""
+        self.app = create_app(replace(
+            CONFIG, SQLALCHEMY_DATABASE_URI="sqlite://", SQLALCHEMY_ENGINE_OPTIONS={}
+        ))
+        self.app.config["TESTING"] = True
+
+        with self.app.app_context():
+            db.create_all()
+
+            subjects = [
+                Subject(subject_code=code, subject_name=code.title(), subject_type="CORE")
+                for code in ("ENG", "BK", "OC")
+            ]
+            db.session.add_all(subjects)
+            db.session.add(Student(roll_no="001", division="A", name="Student 1"))
+            db.session.flush()
+
+            for s in subjects:
+                alloc = TeacherSubjectAllocation()
+                alloc.teacher_id = 1
+                alloc.subject_id = s.subject_id
+                alloc.division = "A"
+                db.session.add(alloc)
+                db.session.add(Mark(roll_no="001", division="A", subject_id=s.subject_id, annual=60, grace=0))
+
+            db.session.commit()
+
+    def tearDown(self):
+        """Clean up after tests"""
+        result_service._generated_from.clear()
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def _percentage(self):
+        return Result.query.filter_by(roll_no="001", division="A").one().percentage
+
+    def test_unchanged_inputs_skip_regeneration(self):
+        """A second call with the same marks does no work"""
+        with self.app.app_context():
+            self.assertTrue(ensure_results_for_division("A"))
+            self.assertFalse(ensure_results_for_division("A"))
+            self.assertEqual(self._percentage(), 60.0)
+
+    def test_edit_in_same_second_from_another_worker(self):
+        """An edit that keeps updated_at and comes from another process is still picked up"""
+        with self.app.app_context():
+            ensure_results_for_division("A")
+
+            # keep updated_at as is, like a second edit within one MySQL DATETIME second
+            mark_id = Mark.query.filter_by(roll_no="001", division="A").first().mark_id
+            db.session.execute(
+                update(Mark).where(Mark.mark_id == mark_id).values(annual=90, updated_at=Mark.updated_at)
+            )
+            db.session.commit()
+
+            self.assertTrue(ensure_results_for_division("A"))
+            self.assertEqual(self._percentage(), 70.0)
+
+    def test_failed_regeneration_is_rolled_back(self):
+        """A failed regeneration on a read is logged and leaves a usable session"""
+        def failing_write(division):
+            db.session.add(Student(roll_no="001", division="A", name="Duplicate"))
+            db.session.flush()
+
+        with self.app.app_context():
+            with mock.patch("services.result_service._write_results", side_effect=failing_write), \
+                    self.assertLogs(self.app.logger, "ERROR"):
+                try_ensure_results_for_division("A")
+
+            self.assertEqual(Student.query.filter_by(division="A").count(), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
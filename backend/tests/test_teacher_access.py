@@ -0,0 +1,64 @@
+# backend/tests/test_teacher_access.py
+"""Division authorization for teacher endpoints"""
+import unittest
+from dataclasses import replace
+
+from config import CONFIG
+from app import create_app, db
+from models import Teacher, Subject, Student, TeacherSubjectAllocation
+from auth import generate_token
+
+
+class TeacherAccessTestCase(unittest.TestCase):
+    """A removed allocation must stop authorizing on the very next request"""
+
+    def setUp(self):
+        """Create an in-memory app with one teacher allocated to division A"""
+        self.app = create_app(replace(
+            CONFIG, SQLALCHEMY_DATABASE_URI="sqlite://", SQLALCHEMY_ENGINE_OPTIONS={}
+        ))
+        self.app.config["TESTING"] = True
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            db.create_all()
+
+            teacher = Teacher(name="Teacher 1", userid="t1", password_hash="x")
+            subject = Subject(subject_code="ENG", subject_name="English", subject_type="CORE")
+            db.session.add_all([teacher, subject])
+            db.session.add(Student(roll_no="001", division="A", name="Student 1"))
+            db.session.flush()
+
+            alloc = TeacherSubjectAllocation()
+            alloc.teacher_id = teacher.teacher_id
+            alloc.subject_id = subject.subject_id
+            alloc.division = "A"
+            db.session.add(alloc)
+            db.session.commit()
+
+            self.token = generate_token(teacher.teacher_id, "TEACHER")
+
+    def tearDown(self):
+        """Clean up after tests"""
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def _get(self, url):
+        return self.client.get(url, headers={"Authorization": f"Bearer {self.token}"})
+
+    def test_deleted_allocation_denied_immediately(self):
+        """Access follows the allocations table, not an earlier answer"""
+        self.assertEqual(self._get("/teacher/students-by-division?division=A").status_code, 200)
+        self.assertEqual(self._get("/teacher/students-by-division?division=B").status_code, 403)
+
+        # removed directly in the database, as another worker process would
+        with self.app.app_context():
+            TeacherSubjectAllocation.query.delete()
+            db.session.commit()
+
+        self.assertEqual(self._get("/teacher/students-by-division?division=A").status_code, 403)
+
+
+if __name__ == "__main__":
+    unittest.main()
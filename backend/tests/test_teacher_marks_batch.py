@@ -0,0 +1,125 @@
+# backend/tests/test_teacher_marks_batch.py
+"""POST /teacher/marks/batch"""
+import unittest
+from dataclasses import replace
+
+from config import CONFIG
+from app import create_app, db
+from models import Teacher, Subject, Student, Mark, TeacherSubjectAllocation
+from auth import generate_token
+
+
+class TeacherMarksBatchTestCase(unittest.TestCase):
+    """Mixed batches of updates and inserts, and batches with rejected rows"""
+
+    def setUp(self):
+        """Create an in-memory app with a teacher allocated ENG and BK in division A"""
+        self.app = create_app(replace(
+            CONFIG, SQLALCHEMY_DATABASE_URI="sqlite://", SQLALCHEMY_ENGINE_OPTIONS={}
+        ))
+        self.app.config["TESTING"] = True
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            db.create_all()
+
+            teacher = Teacher(name="Teacher 1", userid="t1", password_hash="x")
+            other = Teacher(name="Teacher 2", userid="t2", password_hash="x")
+            subjects = [
+                Subject(subject_code=code, subject_name=code.title(), subject_type="CORE")
+                for code in ("ENG", "BK", "ECO")
+            ]
+            db.session.add_all([teacher, other] + subjects)
+            for roll in ("001", "002"):
+                db.session.add(Student(roll_no=roll, division="A", name=f"Student {roll}"))
+            db.session.flush()
+
+            self.subject_ids = {s.subject_code: s.subject_id for s in subjects}
+            for code in ("ENG", "BK"):
+                alloc = TeacherSubjectAllocation()
+                alloc.teacher_id = teacher.teacher_id
+                alloc.subject_id = self.subject_ids[code]
+                alloc.division = "A"
+                db.session.add(alloc)
+
+            # entered earlier by another teacher; an update keeps entered_by
+            db.session.add(Mark(
+                roll_no="001", division="A", subject_id=self.subject_ids["ENG"],
+                unit1=1, unit2=1, term=1, annual=1, tot=4, sub_avg=2, grace=0, entered_by=other.teacher_id,
+            ))
+            db.session.commit()
+
+            self.teacher_id = teacher.teacher_id
+            self.other_id = other.teacher_id
+            self.token = generate_token(teacher.teacher_id, "TEACHER")
+
+    def tearDown(self):
+        """Clean up after tests"""
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def _post(self, entries):
+        return self.client.post(
+            "/teacher/marks/batch", json={"entries": entries}, headers={"Authorization": f"Bearer {self.token}"}
+        )
+
+    def _marks(self):
+        with self.app.app_context():
+            return {
+                (m.roll_no, m.division, m.subject_id):
+                    (m.unit1, m.unit2, m.term, m.annual, m.tot, m.sub_avg, m.grace, m.entered_by)
+                for m in Mark.query.all()
+            }
+
+    def test_updates_and_inserts(self):
+        """Existing marks are updated, new ones inserted, a repeated new key keeps its last values"""
+        eng, bk = self.subject_ids["ENG"], self.subject_ids["BK"]
+        response = self._post([
+            {"roll_no": "001", "division": "A", "subject_id": eng,
+             "unit1": 20, "unit2": 21, "term": 40, "annual": 80, "grace": 2},
+            {"roll": "002", "division": "A", "subject_id": eng, "unit1": 10, "annual": 50},
+            {"roll_no": "002", "division": "A", "subject_id": bk, "annual": 30},
+            {"roll_no": "002", "division": "A", "subject_id": str(bk), "annual": 60, "grace": 1},
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["saved"], [
+            {"roll_no": "001", "division": "A", "subject_id": eng},
+            {"roll_no": "002", "division": "A", "subject_id": eng},
+            {"roll_no": "002", "division": "A", "subject_id": bk},
+            {"roll_no": "002", "division": "A", "subject_id": bk},
+        ])
+        self.assertEqual(self._marks(), {
+            ("001", "A", eng): (20, 21, 40, 80, 161, 80.5, 2, self.other_id),
+            ("002", "A", eng): (10, 0, 0, 50, 60, 30.0, 0, self.teacher_id),
+            ("002", "A", bk): (0, 0, 0, 60, 60, 30.0, 1, self.teacher_id),
+        })
+
+    def test_rejected_rows_save_nothing(self):
+        """Any unauthorized or invalid row rejects the batch; every problem is reported"""
+        before = self._marks()
+        eng, eco = self.subject_ids["ENG"], self.subject_ids["ECO"]
+        response = self._post([
+            {"roll_no": "001", "division": "A", "subject_id": eng, "annual": 90},
+            {"roll_no": "002", "division": "A", "subject_id": eng, "annual": 50},
+            {"roll_no": "002", "division": "A", "subject_id": eco, "annual": 50},
+            {"roll_no": "009", "division": "A", "subject_id": eng, "annual": 50},
+            {"roll_no": "002", "division": "A"},
+            {"roll_no": "002", "division": "A", "subject_id": eng, "annual": "abc"},
+            {"roll_no": "002", "division": "A", "subject_id": eng, "unit1": 26},
+        ])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.get_json()["details"], [
+            {"index": 3, "roll_no": "002", "division": "A", "error": "not authorized for subject/division"},
+            {"index": 4, "roll_no": "009", "division": "A", "error": "student not found"},
+            {"index": 5, "error": "roll_no, division and subject_id are required"},
+            {"index": 6, "roll_no": "002", "error": "invalid numeric value"},
+            {"index": 7, "roll_no": "002", "division": "A", "error": "one or more marks out of allowed ranges"},
+        ])
+        self.assertEqual(self._marks(), before)
+
+
+if __name__ == "__main__":
+    unittest.main()